@@ -0,0 +1,32 @@
+# app/__main__.py
+"""
+python -m app serve [--host HOST] [--port PORT] [--workers N]
+"""
+
+import argparse
+
+from . import config
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m app", description="Cafe Management System")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="run the API with multiple worker processes")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8000)
+    serve.add_argument(
+        "--workers", type=int, default=config.WEB_CONCURRENCY,
+        help="worker processes (default: WEB_CONCURRENCY or one per CPU core)"
+    )
+
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        from .server import serve as run_server
+
+        run_server(args.host, args.port, args.workers)
+
+
+if __name__ == "__main__":
+    main()
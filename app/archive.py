@@ -0,0 +1,350 @@
+# app/archive.py
+"""
+Hot/cold order archival.
+
+`python -m app.archive` moves closed orders (no further status
+transitions) older than ARCHIVE_AFTER_DAYS out of `orders` /
+`order_items` into gzip-compressed NDJSON segments in ARCHIVE_DIR,
+ARCHIVE_SEGMENT_ORDERS orders per file. The `archive_segments` and
+`archive_segment_users` tables index each segment by date range and
+user, so the hot tables stay small enough to live in the page cache.
+
+Archived orders stay readable: list_orders reads through into the
+archive once the hot rows of a page run out (find_archived_orders),
+rebuild_rollups counts them (iter_archived_orders) and the order
+export streams them (stream_archived_orders).
+
+Each segment is written and fsynced before the transaction that
+indexes it and deletes its orders commits, so a crash leaves at worst
+an unreferenced file, never lost orders.
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import uuid
+from datetime import datetime, timedelta
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+
+from . import config
+from .models import ArchiveSegment, ArchiveSegmentUser, Order, OrderItem, ORDER_TRANSITIONS
+from .money import from_cents
+
+# Statuses an order can't leave; only these are archived
+CLOSED_STATUSES = tuple(sorted(status for status, targets in ORDER_TRANSITIONS.items() if not targets))
+
+# Parsed segments kept in memory (segments never change once written)
+SEGMENT_CACHE_SIZE = 8
+
+
+# ===============================
+# WRITING SEGMENTS
+# ===============================
+def _record(order: Order) -> dict:
+    return {
+        "id": order.id,
+        "user_id": order.user_id,
+        "status": order.status,
+        "version": order.version,
+        "ticket": order.ticket,
+        "created_at": order.created_at.isoformat(),
+        "total_amount_cents": order.total_amount_cents,
+        "items": [
+            {
+                "menu_item_id": item.menu_item_id,
+                "quantity": item.quantity,
+                "unit_price_cents": item.unit_price_cents,
+            }
+            for item in order.items
+        ],
+    }
+
+
+def _write_segment(directory: str, orders: List[Order]) -> str:
+    """
+    Write `orders` (newest first) to a new segment; returns its file name.
+    """
+    os.makedirs(directory, exist_ok=True)
+    file_name = "orders-%s-%s.ndjson.gz" % (
+        orders[-1].created_at.strftime("%Y%m%d"), uuid.uuid4().hex[:12]
+    )
+    path = os.path.join(directory, file_name)
+    tmp_path = path + ".tmp"
+
+    with open(tmp_path, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6) as f:
+            for order in orders:
+                f.write(json.dumps(_record(order), separators=(",", ":")).encode() + b"\n")
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(tmp_path, path)
+    return file_name
+
+
+def _segment_users(orders: List[Order]) -> List[dict]:
+    users: Dict[int, dict] = {}
+    for order in orders:
+        if order.user_id is None:
+            continue
+        entry = users.setdefault(order.user_id, {
+            "user_id": order.user_id,
+            "first_created_at": order.created_at,
+            "last_created_at": order.created_at,
+            "order_count": 0,
+        })
+        entry["first_created_at"] = min(entry["first_created_at"], order.created_at)
+        entry["last_created_at"] = max(entry["last_created_at"], order.created_at)
+        entry["order_count"] += 1
+    return list(users.values())
+
+
+def archive_orders(
+    db: Session,
+    older_than: timedelta,
+    segment_orders: int = config.ARCHIVE_SEGMENT_ORDERS,
+    directory: str = config.ARCHIVE_DIR
+) -> Tuple[int, int]:
+    """
+    Archive closed orders created before now - older_than, oldest first.
+    Returns (segments written, orders archived).
+    """
+    cutoff = datetime.utcnow() - older_than
+    segments = archived = 0
+
+    while True:
+        orders = list(db.scalars(
+            select(Order)
+            .options(selectinload(Order.items))
+            .where(Order.status.in_(CLOSED_STATUSES), Order.created_at < cutoff)
+            .order_by(Order.created_at, Order.id)
+            .limit(segment_orders)
+        ))
+        if not orders:
+            break
+
+        # Segments are stored newest first, like list_orders pages
+        orders.reverse()
+        file_name = _write_segment(directory, orders)
+        try:
+            segment = ArchiveSegment(
+                file_name=file_name,
+                first_created_at=orders[-1].created_at,
+                last_created_at=orders[0].created_at,
+                order_count=len(orders),
+            )
+            db.add(segment)
+            db.flush()
+            users = _segment_users(orders)
+            if users:
+                db.execute(
+                    ArchiveSegmentUser.__table__.insert(),
+                    [{"segment_id": segment.id, **entry} for entry in users]
+                )
+
+            order_ids = [order.id for order in orders]
+            db.execute(delete(OrderItem).where(OrderItem.order_id.in_(order_ids)))
+            db.execute(delete(Order).where(Order.id.in_(order_ids)))
+            db.commit()
+        except Exception:
+            db.rollback()
+            os.remove(os.path.join(directory, file_name))
+            raise
+
+        db.expunge_all()
+        segments += 1
+        archived += len(orders)
+
+    return segments, archived
+
+
+# ===============================
+# READING SEGMENTS
+# ===============================
+def _read_segment(path: str) -> Tuple[dict, ...]:
+    records = []
+    with gzip.open(path, "rb") as f:
+        for line in f:
+            record = json.loads(line)
+            record["created_at"] = datetime.fromisoformat(record["created_at"])
+            records.append(record)
+    return tuple(records)
+
+
+_load_segment = lru_cache(maxsize=SEGMENT_CACHE_SIZE)(_read_segment)
+
+
+def _segment_path(file_name: str, directory: str = config.ARCHIVE_DIR) -> str:
+    return os.path.join(directory, file_name)
+
+
+def _response(record: dict) -> dict:
+    """
+    Archived record in the shape of OrderResponse (decimal amounts).
+    """
+    return {
+        "id": record["id"],
+        "total_amount": from_cents(record["total_amount_cents"]),
+        "status": record["status"],
+        "version": record["version"],
+        "created_at": record["created_at"],
+        "items": [
+            {
+                "menu_item_id": item["menu_item_id"],
+                "quantity": item["quantity"],
+                "unit_price": from_cents(item["unit_price_cents"]),
+            }
+            for item in record["items"]
+        ],
+    }
+
+
+async def find_archived_orders(
+    db: AsyncSession,
+    limit: int,
+    user_id: Optional[int] = None,
+    status: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    before: Optional[Tuple[datetime, int]] = None
+) -> List[SimpleNamespace]:
+    """
+    Up to `limit` archived orders matching list_orders' filters, newest
+    first, as objects readable by OrderResponse (from attributes).
+    `before` is a (created_at, id) keyset cursor.
+    """
+    if status and status not in CLOSED_STATUSES:
+        return []
+
+    if user_id is not None:
+        query = select(
+            ArchiveSegment.file_name,
+            ArchiveSegmentUser.first_created_at,
+            ArchiveSegmentUser.last_created_at,
+        ).join(ArchiveSegmentUser, ArchiveSegmentUser.segment_id == ArchiveSegment.id).where(
+            ArchiveSegmentUser.user_id == user_id
+        )
+        first, last = ArchiveSegmentUser.first_created_at, ArchiveSegmentUser.last_created_at
+    else:
+        query = select(
+            ArchiveSegment.file_name,
+            ArchiveSegment.first_created_at,
+            ArchiveSegment.last_created_at,
+        )
+        first, last = ArchiveSegment.first_created_at, ArchiveSegment.last_created_at
+
+    if created_from:
+        query = query.where(last >= created_from)
+    if created_to:
+        query = query.where(first < created_to)
+    if before:
+        query = query.where(first <= before[0])
+
+    segments = (await db.execute(query.order_by(last.desc()))).all()
+    if not segments:
+        return []
+
+    def matches(record: dict) -> bool:
+        if user_id is not None and record["user_id"] != user_id:
+            return False
+        if status and record["status"] != status:
+            return False
+        if created_from and record["created_at"] < created_from:
+            return False
+        if created_to and record["created_at"] >= created_to:
+            return False
+        if before and (record["created_at"], record["id"]) >= before:
+            return False
+        return True
+
+    found: List[dict] = []
+    for index, (file_name, _, _) in enumerate(segments):
+        records = await asyncio.to_thread(_load_segment, _segment_path(file_name))
+        found.extend(record for record in records if matches(record))
+        found.sort(key=lambda record: (record["created_at"], record["id"]), reverse=True)
+
+        # Segments can overlap in time (an order closed late is archived
+        # later); stop once no remaining segment can beat the page
+        following = segments[index + 1] if index + 1 < len(segments) else None
+        if len(found) >= limit and (following is None or following[2] < found[limit - 1]["created_at"]):
+            break
+
+    return [SimpleNamespace(**_response(record)) for record in found[:limit]]
+
+
+async def stream_archived_orders(
+    db: AsyncSession,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None
+) -> AsyncIterator[List[dict]]:
+    """
+    Archived order records created in [created_from, created_to), oldest
+    first, one segment at a time. Segments are read past the segment
+    cache, so a long export holds one segment in memory at most.
+    """
+    query = select(ArchiveSegment.file_name).order_by(ArchiveSegment.first_created_at, ArchiveSegment.id)
+    if created_from:
+        query = query.where(ArchiveSegment.last_created_at >= created_from)
+    if created_to:
+        query = query.where(ArchiveSegment.first_created_at < created_to)
+    file_names = (await db.scalars(query)).all()
+
+    for file_name in file_names:
+        records = await asyncio.to_thread(_read_segment, _segment_path(file_name))
+        yield [
+            record for record in reversed(records)
+            if (not created_from or record["created_at"] >= created_from)
+            and (not created_to or record["created_at"] < created_to)
+        ]
+
+
+def iter_archived_orders(db: Session) -> Iterator[SimpleNamespace]:
+    """
+    Every archived order with cents amounts and items, shaped like an
+    Order for rollup_upserts().
+    """
+    file_names = db.scalars(select(ArchiveSegment.file_name).order_by(ArchiveSegment.id)).all()
+    for file_name in file_names:
+        with gzip.open(_segment_path(file_name), "rb") as f:
+            for line in f:
+                record = json.loads(line)
+                yield SimpleNamespace(
+                    status=record["status"],
+                    created_at=datetime.fromisoformat(record["created_at"]),
+                    total_amount_cents=record["total_amount_cents"],
+                    items=[SimpleNamespace(**item) for item in record["items"]],
+                )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from .migrations import verify_schema
+    from .stores import store_engine
+
+    parser = argparse.ArgumentParser(prog="python -m app.archive", description="Archive closed orders")
+    parser.add_argument("--older-than-days", type=int, default=config.ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--segment-orders", type=int, default=config.ARCHIVE_SEGMENT_ORDERS)
+    parser.add_argument("--vacuum", action="store_true", help="compact the database file afterwards")
+    parser.add_argument("--store", help="a store's database instead of the main one")
+    args = parser.parse_args()
+
+    engine = store_engine(args.store)
+    verify_schema(engine)
+    db = Session(engine, autoflush=False)
+    try:
+        segments, archived = archive_orders(db, timedelta(days=args.older_than_days), args.segment_orders)
+    finally:
+        db.close()
+
+    if args.vacuum and archived:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql("VACUUM")
+    engine.dispose()
+    print(f"✅ Archived {archived} orders into {segments} segments in {config.ARCHIVE_DIR}")
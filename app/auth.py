@@ -1,16 +1,25 @@
 # app/auth.py what the hell
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 
+from . import config
+
 # Secret key for JWT (keep safe)
 SECRET_KEY = "your_secret_key_here"  # Replace with random string in real projects
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 # Password hashing context — only argon2 (Windows-safe)
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+# Cost parameters come from config; needs_update() flags older hashes
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__rounds=config.ARGON2_TIME_COST,
+    argon2__memory_cost=config.ARGON2_MEMORY_COST,
+    argon2__parallelism=config.ARGON2_PARALLELISM,
+)
 
 # Hash password
 def hash_password(password: str) -> str:
@@ -20,6 +29,11 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+# Verify password and re-hash it if the cost parameters changed
+# Returns (valid, new_hash_or_None)
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 # Create JWT token
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
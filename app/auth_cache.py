@@ -0,0 +1,113 @@
+# app/auth_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from sqlalchemy import event, inspect
+
+from . import config
+from .models import User
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries expire at a per-entry deadline
+    (time.time() seconds). Counts hits and misses.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, expires_at: float) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# token -> username, expiring at the token's own `exp`
+token_cache = TTLCache(config.AUTH_TOKEN_CACHE_SIZE)
+
+# username -> (id, role), short TTL plus invalidation on change
+user_cache = TTLCache(config.AUTH_USER_CACHE_SIZE)
+
+
+def cache_user(user: User) -> None:
+    user_cache.set(
+        user.username,
+        (user.id, user.role),
+        time.time() + config.AUTH_USER_CACHE_TTL
+    )
+
+
+def get_cached_user(username: str) -> Optional[User]:
+    """
+    Returns a detached User carrying only id, username and role,
+    or None if the user isn't cached.
+    """
+    cached = user_cache.get(username)
+    if cached is None:
+        return None
+    user_id, role = cached
+    return User(id=user_id, username=username, role=role)
+
+
+def invalidate_user(username: str) -> None:
+    user_cache.pop(username)
+
+
+def auth_cache_stats() -> dict:
+    return {
+        "tokens": token_cache.stats(),
+        "users": user_cache.stats(),
+    }
+
+
+# Drop cached user rows whenever a User is changed or deleted in-process
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_on_change(mapper, connection, target):
+    invalidate_user(target.username)
+    # A renamed user must not stay cached under the old name
+    for old_username in inspect(target).attrs.username.history.deleted:
+        invalidate_user(old_username)
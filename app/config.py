@@ -0,0 +1,127 @@
+# app/config.py
+import os
+
+
+def env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# ===============================
+# DATABASE
+# ===============================
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./cafe.db")
+
+# Connection pool (ignored for in-memory SQLite)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_PRE_PING = env_bool("DB_POOL_PRE_PING", True)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds, -1 disables
+
+# SQLite tuning applied to every new connection
+SQLITE_WAL = env_bool("SQLITE_WAL", True)
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+# ===============================
+# STORES (one database per location, see app/stores.py)
+# ===============================
+# Comma-separated store ids; empty = everything in DATABASE_URL
+STORES = tuple(store.strip() for store in os.getenv("STORES", "").split(",") if store.strip())
+STORE_DATABASE_URL = os.getenv("STORE_DATABASE_URL", "sqlite:///./stores/{store}.db")
+# Store engines kept open per worker (least recently used are closed)
+STORE_ENGINES_MAX = int(os.getenv("STORE_ENGINES_MAX", "16"))
+
+# ===============================
+# AUTH CACHES
+# ===============================
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", "1000"))
+AUTH_USER_CACHE_TTL = int(os.getenv("AUTH_USER_CACHE_TTL", "60"))  # seconds
+
+# ===============================
+# PASSWORD HASHING / LOGIN
+# ===============================
+# Argon2 cost parameters; stored hashes using other values are
+# transparently re-hashed on the next successful login
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))  # KiB
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "4"))
+
+# Dedicated pool for hashing so logins can't starve other requests
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "16"))
+
+# Failed login attempts allowed per window before answering 429
+LOGIN_WINDOW_SECONDS = int(os.getenv("LOGIN_WINDOW_SECONDS", "300"))
+LOGIN_MAX_FAILURES_PER_USER = int(os.getenv("LOGIN_MAX_FAILURES_PER_USER", "5"))
+LOGIN_MAX_FAILURES_PER_IP = int(os.getenv("LOGIN_MAX_FAILURES_PER_IP", "20"))
+
+# ===============================
+# INSTRUMENTATION
+# ===============================
+METRICS_ENABLED = env_bool("METRICS_ENABLED", True)
+# Fraction of requests to profile with cProfile (0 disables)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+
+# ===============================
+# IDEMPOTENCY
+# ===============================
+# How long a POST /orders/ Idempotency-Key is remembered
+IDEMPOTENCY_KEY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", "24"))
+
+# ===============================
+# ORDER INGESTION
+# ===============================
+# Answer POST /orders/ with 202 Accepted and group-commit orders
+# from a background writer instead of one transaction per request
+ORDER_WRITE_BEHIND = env_bool("ORDER_WRITE_BEHIND", False)
+ORDER_BATCH_MAX_SIZE = int(os.getenv("ORDER_BATCH_MAX_SIZE", "200"))
+# How long the writer waits for more orders before committing a batch
+ORDER_BATCH_MAX_DELAY_MS = int(os.getenv("ORDER_BATCH_MAX_DELAY_MS", "5"))
+# Accepted but unwritten orders allowed before answering 503
+ORDER_QUEUE_MAX_PENDING = int(os.getenv("ORDER_QUEUE_MAX_PENDING", "10000"))
+
+# ===============================
+# ORDER STREAM (kitchen displays)
+# ===============================
+# How often each worker checks for order events committed by other
+# workers (its own commits are picked up immediately)
+ORDER_EVENTS_POLL_MS = int(os.getenv("ORDER_EVENTS_POLL_MS", "250"))
+
+# ===============================
+# ORDER ARCHIVE (python -m app.archive)
+# ===============================
+# Closed orders older than this move to compressed segments on disk
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "./archive")
+ARCHIVE_SEGMENT_ORDERS = int(os.getenv("ARCHIVE_SEGMENT_ORDERS", "10000"))
+
+# ===============================
+# SERVER (python -m app serve)
+# ===============================
+# Worker processes; defaults to one per CPU core
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "0")) or (os.cpu_count() or 1)
+# How long a worker may spend finishing in-flight requests after SIGTERM
+SHUTDOWN_GRACE_SECONDS = int(os.getenv("SHUTDOWN_GRACE_SECONDS", "30"))
+
+# ===============================
+# FRONTEND / COMPRESSION
+# ===============================
+# The API serves the frontend under FRONTEND_PATH: the build from
+# `python -m app.frontend` if present, else the sources
+FRONTEND_DIR = os.getenv("FRONTEND_DIR", "./frontend")
+FRONTEND_DIST_DIR = os.getenv("FRONTEND_DIST_DIR", "./frontend/dist")
+FRONTEND_PATH = os.getenv("FRONTEND_PATH", "/app")
+# gzip API responses at least this large (bytes); 0 disables
+GZIP_MIN_SIZE = int(os.getenv("GZIP_MIN_SIZE", "1000"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "5"))
+
+# ===============================
+# SERIALIZATION
+# ===============================
+# Encode JSON responses with pydantic-core instead of json.dumps
+FAST_JSON = env_bool("FAST_JSON", True)
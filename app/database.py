@@ -1,18 +1,111 @@
 # app/database.py
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-# SQLite database file
-DATABASE_URL = "sqlite:///./cafe.db"
+from . import config
 
-# Create engine
-engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}
+# Database URL (env DATABASE_URL, defaults to the local SQLite file)
+DATABASE_URL = config.DATABASE_URL
+
+# Async drivers for the same database
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def to_async_url(url: str) -> str:
+    """
+    Swap the driver of a sync database URL for its async counterpart,
+    e.g. sqlite:///./cafe.db -> sqlite+aiosqlite:///./cafe.db
+    """
+    scheme, rest = url.split("://", 1)
+    return f"{ASYNC_DRIVERS.get(scheme.split('+')[0], scheme)}://{rest}"
+
+
+def is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def engine_options(url: str) -> dict:
+    """
+    Pool and driver options for `url`, taken from app.config.
+    """
+    options = {
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+    }
+
+    if is_sqlite(url):
+        options["connect_args"] = {"check_same_thread": False}
+        # In-memory databases use a single shared connection, no sizing
+        if make_url(url).database in (None, "", ":memory:"):
+            return options
+
+    options["pool_size"] = config.DB_POOL_SIZE
+    options["max_overflow"] = config.DB_MAX_OVERFLOW
+    return options
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    WAL lets readers proceed while a writer commits; NORMAL sync is
+    durable in WAL mode and avoids an fsync per transaction.
+    """
+    cursor = dbapi_connection.cursor()
+    if config.SQLITE_WAL:
+        cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA synchronous={config.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={config.SQLITE_BUSY_TIMEOUT_MS:d}")
+    cursor.execute(f"PRAGMA mmap_size={config.SQLITE_MMAP_SIZE:d}")
+    cursor.close()
+
+
+def configure_engine(engine: Engine, url: str) -> Engine:
+    """
+    Install per-connection hooks (SQLite PRAGMAs) on a sync engine or
+    on the sync_engine of an async one.
+    """
+    if is_sqlite(url):
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+    return engine
+
+
+# Create engine (scripts, table creation)
+engine = configure_engine(
+    create_engine(DATABASE_URL, **engine_options(DATABASE_URL)),
+    DATABASE_URL
 )
 
 # Session
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine and session (API routes)
+# expire_on_commit=False: objects stay readable after commit without
+# implicit lazy loads, which are not allowed on an AsyncSession
+async_engine = create_async_engine(
+    to_async_url(DATABASE_URL), **engine_options(DATABASE_URL)
+)
+configure_engine(async_engine.sync_engine, DATABASE_URL)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
+
+
+
+def reset_after_fork() -> None:
+    """
+    Call first thing in a forked worker. Pooled connections inherited
+    from the parent are dropped without being closed (closing would
+    close them for the parent too); each worker opens its own.
+    """
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+
+
 # Base class for models
 Base = declarative_base()
@@ -1,14 +1,18 @@
 # app/dependencies.py
 
-from typing import Optional
-from fastapi import Depends, HTTPException, status
+from typing import AsyncIterator, Optional
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
 
-from .database import SessionLocal
+from .database import SessionLocal, AsyncSessionLocal
 from .models import User
 from .auth import SECRET_KEY, ALGORITHM
+from .auth_cache import token_cache, cache_user, get_cached_user
+from .stores import current_store, session_for
 
 # ===============================
 # OAuth2 JWT scheme
@@ -31,12 +35,64 @@ def get_db() -> Session:
         db.close()
 
 
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """
+    Provides an async SQLAlchemy session for `async def` routes, on the
+    request's store database (see app/stores.py).
+    """
+    async with session_for(current_store.get()) as db:
+        yield db
+
+
+async def get_users_db(db: AsyncSession = Depends(get_async_db)) -> AsyncIterator[AsyncSession]:
+    """
+    Session on the main database, where accounts live. Shares the
+    request's session unless the request is for a store.
+    """
+    if current_store.get() is None:
+        yield db
+        return
+    async with AsyncSessionLocal() as users_db:
+        yield users_db
+
+
+# ===============================
+# TOKEN / USER LOOKUP (cached)
+# ===============================
+def _decode_username(token: str) -> Optional[str]:
+    """
+    Returns the token's subject, verifying the signature only on a
+    cache miss. Raises JWTError for invalid tokens.
+    """
+    username = token_cache.get(token)
+    if username is not None:
+        return username
+
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    username = payload.get("sub")
+    if username and payload.get("exp"):
+        token_cache.set(token, username, float(payload["exp"]))
+    return username
+
+
+async def _get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
+    user = get_cached_user(username)
+    if user is not None:
+        return user
+
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalars().first()
+    if user:
+        cache_user(user)
+    return user
+
+
 # ===============================
 # STRICT AUTH: Admin / Staff Only
 # ===============================
-def get_current_user(
+async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_users_db)
 ) -> User:
     """
     Strict authentication.
@@ -56,26 +112,37 @@ def get_current_user(
     )
 
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str | None = payload.get("sub")
+        username: str | None = _decode_username(token)
         if not username:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
 
-    user = db.query(User).filter(User.username == username).first()
+    user = await _get_user_by_username(db, username)
     if not user:
         raise credentials_exception
 
     return user
 
 
+# ===============================
+# STREAM AUTH: header or ?access_token=
+# Browsers' EventSource cannot send an Authorization header
+# ===============================
+async def get_stream_user(
+    token: Optional[str] = Depends(oauth2_scheme),
+    access_token: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_users_db)
+) -> User:
+    return await get_current_user(token or access_token, db)
+
+
 # ===============================
 # OPTIONAL AUTH: Guests Allowed
 # ===============================
-def get_optional_user(
+async def get_optional_user(
     token: Optional[str] = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_users_db)
 ) -> Optional[User]:
     """
     Returns a User object if JWT token is valid.
@@ -85,14 +152,13 @@ def get_optional_user(
         return None
 
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: Optional[str] = payload.get("sub")
+        username: Optional[str] = _decode_username(token)
         if not username:
             return None
     except JWTError:
         return None
 
-    return db.query(User).filter(User.username == username).first()
+    return await _get_user_by_username(db, username)
 
 
 # ===============================
@@ -105,7 +171,7 @@ def require_role(required_role: str):
     Usage:
         @router.post("/", dependencies=[Depends(require_role("admin"))])
     """
-    def role_checker(current_user: User = Depends(get_current_user)) -> User:
+    async def role_checker(current_user: User = Depends(get_current_user)) -> User:
         if current_user.role != required_role:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -114,3 +180,18 @@ def require_role(required_role: str):
         return current_user
 
     return role_checker
+
+
+def require_any_role(*roles: str):
+    """
+    Like require_role, but any of `roles` is accepted.
+    """
+    async def role_checker(current_user: User = Depends(get_current_user)) -> User:
+        if current_user.role not in roles:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"User must have one of the roles: {', '.join(roles)}"
+            )
+        return current_user
+
+    return role_checker
@@ -0,0 +1,170 @@
+# app/events.py
+"""
+Fan-out of order events to connected kitchen displays, across all
+server workers.
+
+A change that kitchen displays care about adds a row to `order_events`
+in its own transaction (record_events), so the event exists exactly
+when the change has committed, whichever worker committed it. While a
+worker has subscribers for a store, one task per store tails that
+table: it polls for rows newer than the last one seen every
+ORDER_EVENTS_POLL_MS, or right away after a local commit (wake), and
+hands them to the subscribers.
+
+Each event is encoded once as a Server-Sent Events frame and the same
+string is handed to every subscriber queue, so N displays cost one
+query per poll instead of N. Event ids are the row ids, the same in
+every worker, so a display that reconnects to another worker resumes
+from its Last-Event-ID out of that worker's replay buffer.
+
+Only the newest EVENTS_KEPT rows are kept. Each store (app/stores.py)
+has its own table and broker.
+"""
+
+import asyncio
+import logging
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import config
+from .models import OrderEvent
+from .stores import session_for
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_QUEUE_SIZE = 100
+REPLAY_BUFFER_SIZE = 200
+# Rows left in order_events; older ones are deleted as new ones arrive
+EVENTS_KEPT = 1000
+
+
+async def record_events(db: AsyncSession, events: List[Tuple[str, str]]) -> None:
+    """
+    Adds (event, JSON payload) rows to the current transaction; they
+    reach the displays once it commits.
+    """
+    rows = [OrderEvent(event=event, payload=payload) for event, payload in events]
+    db.add_all(rows)
+    await db.flush()
+    newest = max(row.id for row in rows)
+    await db.execute(delete(OrderEvent).where(OrderEvent.id <= newest - EVENTS_KEPT))
+
+
+class OrderBroker:
+    def __init__(self, store: Optional[str], poll_interval: float):
+        self.store = store
+        self.poll_interval = poll_interval
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._recent: Deque[Tuple[int, str]] = deque(maxlen=REPLAY_BUFFER_SIZE)
+        # Newest event seen; None until the first poll
+        self._last_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop = None
+        self._ready: Optional[asyncio.Event] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def wake(self) -> None:
+        """
+        Poll now instead of at the next interval (call after committing
+        an event). Must be called from the event loop thread.
+        """
+        if self._task is not None and not self._task.done():
+            self._wake.set()
+
+    async def subscribe(self, last_event_id: Optional[int] = None) -> asyncio.Queue:
+        await self._start()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        if last_event_id is not None:
+            missed: List[str] = [frame for seq, frame in self._recent if seq > last_event_id]
+            for frame in missed[-SUBSCRIBER_QUEUE_SIZE:]:
+                queue.put_nowait(frame)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    # ===============================
+    # TAILING order_events
+    # ===============================
+    async def _start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._ready = asyncio.Event()
+            self._wake = asyncio.Event()
+            self._recent.clear()
+            self._last_id = None
+            self._task = loop.create_task(self._tail(self._ready, self._wake))
+        # The replay buffer is loaded before the first subscriber is added
+        await self._ready.wait()
+
+    async def _tail(self, ready: asyncio.Event, wake: asyncio.Event) -> None:
+        while True:
+            try:
+                await self._poll()
+            except Exception:
+                logger.exception("Reading order events failed (store %s)", self.store)
+            ready.set()
+
+            try:
+                await asyncio.wait_for(wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            wake.clear()
+            # Stopped until the next subscribe()
+            if not self._subscribers:
+                return
+
+    async def _poll(self) -> None:
+        query = select(OrderEvent.id, OrderEvent.event, OrderEvent.payload)
+        async with session_for(self.store) as db:
+            if self._last_id is None:
+                # Starting: fill the replay buffer, nobody is listening yet
+                rows = (await db.execute(query.order_by(OrderEvent.id.desc()).limit(REPLAY_BUFFER_SIZE))).all()
+                rows.reverse()
+            else:
+                rows = (await db.execute(query.where(OrderEvent.id > self._last_id).order_by(OrderEvent.id))).all()
+
+        for event_id, event, payload in rows:
+            self._publish(event_id, f"id: {event_id}\nevent: {event}\ndata: {payload}\n\n")
+        if self._last_id is None:
+            self._last_id = 0
+        if rows:
+            self._last_id = rows[-1][0]
+
+    def _publish(self, event_id: int, frame: str) -> None:
+        self._recent.append((event_id, frame))
+
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                # A display that stopped reading is disconnected rather
+                # than waited on; it reconnects and replays what it missed
+                self._subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+
+_order_brokers: Dict[Optional[str], OrderBroker] = {}
+
+
+def order_broker_for(store: Optional[str]) -> OrderBroker:
+    """
+    Broker for `store`'s orders (None = main database).
+    """
+    broker = _order_brokers.get(store)
+    if broker is None:
+        broker = _order_brokers.setdefault(
+            store, OrderBroker(store, config.ORDER_EVENTS_POLL_MS / 1000)
+        )
+    return broker
@@ -0,0 +1,190 @@
+# app/frontend.py
+"""
+Serving the frontend from the API (same origin: no CORS preflights).
+
+`python -m app.frontend` builds FRONTEND_DIR into FRONTEND_DIST_DIR:
+
+- every asset except the HTML pages gets a content hash in its name
+  (main.3f2a9c0b1d.js) and the pages are rewritten to reference it, so
+  assets can be cached for a year and a deploy still takes effect on
+  the next page load
+- text files get precompressed .gz (and .br, if the `brotli` package
+  is installed) variants, compressed once at maximum level instead of
+  on every request
+
+FrontendFiles serves the build (or FRONTEND_DIR itself when there is
+no build, for development) under FRONTEND_PATH, picking a
+precompressed variant the client accepts (brotli first).
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import shutil
+from typing import Dict, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from . import config
+
+COMPRESSIBLE_EXTENSIONS = (".html", ".js", ".css", ".svg", ".json", ".txt", ".map")
+# Not worth a compressed variant below this size
+MIN_COMPRESS_SIZE = 256
+
+# Local references rewritten to hashed names in the pages
+REFERENCE = re.compile(r"""\b(href|src)=(["'])([^"'#?:]+)\2""")
+# main.3f2a9c0b1d.js
+HASHED_NAME = re.compile(r"\.[0-9a-f]{10}\.\w+$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Pages (and unbuilt assets) are revalidated on every load
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Preferred first
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+# ===============================
+# BUILD
+# ===============================
+def _hashed_name(name: str, content: bytes) -> str:
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:10]}{ext}"
+
+
+def _compress(path: str, content: bytes, brotli) -> None:
+    if len(content) < MIN_COMPRESS_SIZE or not path.endswith(COMPRESSIBLE_EXTENSIONS):
+        return
+    variants = [(".gz", gzip.compress(content, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((".br", brotli.compress(content, quality=11)))
+    for suffix, compressed in variants:
+        if len(compressed) < len(content):
+            with open(path + suffix, "wb") as f:
+                f.write(compressed)
+
+
+def build_frontend(source: str = config.FRONTEND_DIR, dest: str = config.FRONTEND_DIST_DIR) -> Dict[str, str]:
+    """
+    Build `source` into `dest` (replaced as a whole). Returns the
+    original -> hashed asset names.
+    """
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+
+    source = os.path.abspath(source)
+    dest = os.path.abspath(dest)
+    staging = dest + ".tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+
+    pages: Dict[str, bytes] = {}
+    assets: Dict[str, bytes] = {}
+    for root, dirs, files in os.walk(source):
+        # The build usually lives inside the source directory
+        dirs[:] = [d for d in dirs if os.path.join(root, d) not in (dest, staging)]
+        for name in files:
+            path = os.path.join(root, name)
+            relative = os.path.relpath(path, source).replace(os.sep, "/")
+            with open(path, "rb") as f:
+                (pages if name.endswith(".html") else assets)[relative] = f.read()
+
+    renamed = {
+        relative: "/".join(filter(None, [os.path.dirname(relative), _hashed_name(os.path.basename(relative), content)]))
+        for relative, content in assets.items()
+    }
+
+    def rewrite(page: str, html: bytes) -> bytes:
+        # href="styles.css" / src="main.js", relative to the page
+        base = os.path.dirname(page)
+
+        def replace(match) -> str:
+            attribute, quote, url = match.groups()
+            target = os.path.normpath(os.path.join(base, url)).replace(os.sep, "/")
+            if target not in renamed:
+                return match.group(0)
+            hashed = os.path.relpath(renamed[target], base or ".").replace(os.sep, "/")
+            return f"{attribute}={quote}{hashed}{quote}"
+
+        return REFERENCE.sub(replace, html.decode("utf-8")).encode("utf-8")
+
+    outputs = [(renamed[relative], content) for relative, content in assets.items()]
+    outputs += [(page, rewrite(page, html)) for page, html in pages.items()]
+    for relative, content in outputs:
+        path = os.path.join(staging, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(content)
+        _compress(path, content, brotli)
+
+    shutil.rmtree(dest, ignore_errors=True)
+    os.replace(staging, dest)
+    return renamed
+
+
+# ===============================
+# SERVING
+# ===============================
+class FrontendFiles(StaticFiles):
+    """
+    StaticFiles that serves precompressed variants and sets
+    Cache-Control by file name.
+    """
+
+    def _variant(self, full_path: str, request_headers: Headers) -> Tuple[Optional[str], str]:
+        accepted = request_headers.get("accept-encoding", "")
+        for encoding, suffix in ENCODINGS:
+            if encoding in accepted and os.path.isfile(full_path + suffix):
+                return encoding, full_path + suffix
+        return None, full_path
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        full_path = os.fspath(full_path)
+        encoding, path = self._variant(full_path, request_headers)
+
+        response = FileResponse(
+            path,
+            status_code=status_code,
+            stat_result=os.stat(path) if encoding else stat_result,
+            media_type=mimetypes.guess_type(full_path)[0] or "text/plain",
+        )
+        if encoding:
+            response.headers["content-encoding"] = encoding
+        if full_path.endswith(COMPRESSIBLE_EXTENSIONS):
+            response.headers.add_vary_header("Accept-Encoding")
+        response.headers["cache-control"] = (
+            IMMUTABLE_CACHE_CONTROL if HASHED_NAME.search(full_path) else REVALIDATE_CACHE_CONTROL
+        )
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+def frontend_directory() -> Optional[str]:
+    """
+    The build if there is one, else the sources; None if neither exists.
+    """
+    for directory in (config.FRONTEND_DIST_DIR, config.FRONTEND_DIR):
+        if os.path.isfile(os.path.join(directory, "index.html")):
+            return directory
+    return None
+
+
+if __name__ == "__main__":
+    renamed = build_frontend()
+    for original, hashed in sorted(renamed.items()):
+        print(f"  {original} -> {hashed}")
+    print(f"✅ Built {config.FRONTEND_DIR} into {config.FRONTEND_DIST_DIR}")
@@ -0,0 +1,85 @@
+# app/idempotency.py
+
+import hashlib
+import random
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import HTTPException, Response, status
+from pydantic import BaseModel
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import config
+from .models import IdempotencyKey
+
+# Share of writes that also purge expired keys
+PURGE_PROBABILITY = 0.01
+
+
+def request_fingerprint(user_id: Optional[int], payload: BaseModel) -> str:
+    """
+    Hash of who sent the request and what it contained, so a key reused
+    for a different order is detected.
+    """
+    raw = f"{user_id}|{payload.model_dump_json()}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _cutoff() -> datetime:
+    return datetime.utcnow() - timedelta(hours=config.IDEMPOTENCY_KEY_TTL_HOURS)
+
+
+async def stored_response(db: AsyncSession, key: str, fingerprint: str) -> Optional[Response]:
+    """
+    Returns the stored response for `key` (a single primary-key lookup),
+    or None if the key is new or expired.
+    Raises 422 if the key was used for a different request.
+    """
+    record = await db.get(IdempotencyKey, key)
+    if record is None:
+        return None
+
+    if record.created_at < _cutoff():
+        await db.delete(record)
+        await db.flush()
+        return None
+
+    if record.request_hash != fingerprint:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail="Idempotency-Key was already used for a different request"
+        )
+
+    return Response(
+        content=record.response_body,
+        status_code=record.status_code,
+        media_type="application/json",
+        headers={"Idempotent-Replayed": "true"}
+    )
+
+
+async def store_response(
+    db: AsyncSession,
+    key: str,
+    fingerprint: str,
+    status_code: int,
+    body: str
+) -> None:
+    """
+    Adds the response to the current transaction, so it commits
+    atomically with the write it describes. An expired row for the same
+    key is replaced (the write-behind writer doesn't share the session
+    in which stored_response() found it expired).
+    """
+    await db.execute(
+        delete(IdempotencyKey).where(IdempotencyKey.key == key, IdempotencyKey.created_at < _cutoff())
+    )
+    db.add(IdempotencyKey(
+        key=key,
+        request_hash=fingerprint,
+        status_code=status_code,
+        response_body=body
+    ))
+    if random.random() < PURGE_PROBABILITY:
+        await db.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < _cutoff()))
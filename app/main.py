@@ -1,16 +1,46 @@
 # app/main.py
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from .database import engine
-from . import models
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
+from .database import async_engine, engine
+from . import config
+from .frontend import FrontendFiles, frontend_directory
+from .migrations import verify_schema
+from .metrics import MetricsMiddleware
+from .order_queue import order_writer
+from .serialization import FastJSONResponse
+from .stores import StoreMiddleware, store_registry, verify_store_schemas
 from .routes import users   # Auth routes
 from .routes import menu    # Menu CRUD routes
 from .routes import orders  # Orders routes
+from .routes import reports # Sales reports
+from .routes import metrics # Prometheus metrics / profiling
+from .routes import health  # Liveness / readiness probes
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema changes are applied by `python -m app.migrations upgrade`;
+    # workers only refuse to start against a database at another version
+    verify_schema(engine)
+    verify_store_schemas()
+    yield
+    health.start_draining()
+    # Commit orders still waiting in the write-behind queue
+    await order_writer.stop()
+    await store_registry.dispose()
+    # Pooled aiosqlite connections run on threads that block interpreter exit
+    await async_engine.dispose()
 
 
 app = FastAPI(
     title="Cafe Management System",
     description="API for managing cafe orders, menu, and sales",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse if config.FAST_JSON else JSONResponse
 )
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -20,10 +50,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Location"],  # keyset pagination / order tickets
 )
 
-# Create tables
-models.Base.metadata.create_all(bind=engine)
+# Per-route latency, query counts and Server-Timing header
+if config.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Route /stores/<store>/... and X-Store-Id requests to the store's database
+app.add_middleware(StoreMiddleware)
+
+# Compress JSON / CSV responses (outermost, so timing headers survive;
+# precompressed frontend files and the SSE stream pass through as-is)
+if config.GZIP_MIN_SIZE > 0:
+    app.add_middleware(GZipMiddleware, minimum_size=config.GZIP_MIN_SIZE, compresslevel=config.GZIP_LEVEL)
 
 # Include auth routes
 app.include_router(users.router)
@@ -34,6 +74,20 @@ app.include_router(menu.router)
 # Include orders routes (CRUD for orders)
 app.include_router(orders.router)
 
+# Include sales report routes (admin only)
+app.include_router(reports.router)
+
+# Include metrics routes (/metrics for Prometheus, profiling for admins)
+if config.METRICS_ENABLED:
+    app.include_router(metrics.router)
+
+# Include health probes (/health/live, /health/ready)
+app.include_router(health.router)
+
+# Serve the frontend from the same origin (no CORS preflights)
+if frontend_directory():
+    app.mount(config.FRONTEND_PATH, FrontendFiles(directory=frontend_directory(), html=True), name="frontend")
+
 @app.get("/")
 def root():
     return {"message": "Cafe Management System API is running"}
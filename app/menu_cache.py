@@ -0,0 +1,125 @@
+# app/menu_cache.py
+
+import hashlib
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .schemas import MenuListItem
+from .serialization import orm_json
+from .stores import current_store
+
+# Safety net for multi-worker deployments: a worker that did not see the
+# write itself re-reads the menu at most this many seconds later.
+MENU_CACHE_TTL_SECONDS = 60
+
+
+class MenuCache:
+    """
+    Versioned snapshot of the public menu.
+
+    Holds the pre-encoded JSON body and its strong ETag, plus the
+    available items by id for validating write-behind orders. Every
+    write to the menu calls bump(), which moves the version forward and
+    drops both snapshots so the next read rebuilds them from the database.
+    """
+
+    def __init__(self, ttl: float = MENU_CACHE_TTL_SECONDS):
+        self._lock = threading.Lock()
+        self._ttl = ttl
+        self._version = 0
+        # (version, built_at, body, etag)
+        self._snapshot: Optional[Tuple[int, float, bytes, str]] = None
+        # (version, built_at, {menu_item_id: item})
+        self._items: Optional[Tuple[int, float, Dict[int, Any]]] = None
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def bump(self) -> int:
+        with self._lock:
+            self._version += 1
+            self._snapshot = None
+            self._items = None
+            return self._version
+
+    def _fresh(self, snapshot) -> bool:
+        return (
+            snapshot is not None
+            and snapshot[0] == self._version
+            and time.monotonic() - snapshot[1] < self._ttl
+        )
+
+    async def get(self, loader: Callable[[], Awaitable[Iterable]]) -> Tuple[bytes, str]:
+        """
+        Return (body, etag) for the current menu version.
+        `loader` is only awaited when the snapshot is missing or stale.
+        """
+        snapshot = self._snapshot
+        if self._fresh(snapshot):
+            return snapshot[2], snapshot[3]
+
+        version = self._version
+        body = orm_json(List[MenuListItem], list(await loader()))
+        etag = '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+
+        with self._lock:
+            # Don't store a snapshot that a concurrent write already outdated
+            if self._version == version:
+                self._snapshot = (version, time.monotonic(), body, etag)
+
+        return body, etag
+
+    async def items(self, loader: Callable[[], Awaitable[Iterable]]) -> Dict[int, Any]:
+        """
+        Return the items yielded by `loader` keyed by id, for the current
+        menu version. The items are shared between requests: read only.
+        """
+        snapshot = self._items
+        if self._fresh(snapshot):
+            return snapshot[2]
+
+        version = self._version
+        items = {item.id: item for item in await loader()}
+
+        with self._lock:
+            if self._version == version:
+                self._items = (version, time.monotonic(), items)
+
+        return items
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Weak comparison as required for If-None-Match (RFC 9110 §13.1.2).
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+# One cache per store database (None = main database)
+_menu_caches: Dict[Optional[str], MenuCache] = {}
+
+
+def menu_cache_for(store: Optional[str]) -> MenuCache:
+    cache = _menu_caches.get(store)
+    if cache is None:
+        cache = _menu_caches.setdefault(store, MenuCache())
+    return cache
+
+
+def current_menu_cache() -> MenuCache:
+    """
+    Menu cache of the current request's store.
+    """
+    return menu_cache_for(current_store.get())
@@ -0,0 +1,276 @@
+# app/metrics.py
+"""
+Request instrumentation.
+
+- MetricsMiddleware times every HTTP request, adds a Server-Timing
+  header and feeds per-route histograms.
+- SQLAlchemy cursor events count queries and query time for the
+  request that issued them (tracked through a context variable), so
+  N+1 patterns show up as numbers per route.
+- render_prometheus() exposes everything in Prometheus text format.
+- A sampling profiler runs cProfile while a configurable fraction of
+  requests is in flight and keeps the most recent reports in memory
+  (approximate under concurrency, see SamplingProfiler).
+"""
+
+import cProfile
+import io
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+from . import config
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+# ===============================
+# PER-REQUEST QUERY STATS
+# ===============================
+class RequestStats:
+    __slots__ = ("queries", "query_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+
+
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    stats = _current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_seconds += elapsed
+
+
+# ===============================
+# METRIC REGISTRY
+# ===============================
+class Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{{{labels}}} {self.total}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.queries: Dict[Tuple[str, str], Histogram] = {}
+        self.query_seconds: Dict[Tuple[str, str], float] = {}
+        self.responses: Dict[Tuple[str, str, int], int] = {}
+
+    def observe(self, method: str, route: str, status_code: int, seconds: float, stats: RequestStats) -> None:
+        key = (method, route)
+        with self._lock:
+            if key not in self.latency:
+                self.latency[key] = Histogram(LATENCY_BUCKETS)
+                self.queries[key] = Histogram(QUERY_COUNT_BUCKETS)
+                self.query_seconds[key] = 0.0
+            self.latency[key].observe(seconds)
+            self.queries[key].observe(stats.queries)
+            self.query_seconds[key] += stats.query_seconds
+            status_key = (method, route, status_code)
+            self.responses[status_key] = self.responses.get(status_key, 0) + 1
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            lines.append("# HELP http_requests_total HTTP responses by route and status.")
+            lines.append("# TYPE http_requests_total counter")
+            for (method, route, code), count in sorted(self.responses.items()):
+                lines.append(f'http_requests_total{{method="{method}",route="{route}",status="{code}"}} {count}')
+
+            lines.append("# HELP http_request_duration_seconds Request latency by route.")
+            lines.append("# TYPE http_request_duration_seconds histogram")
+            for (method, route), histogram in sorted(self.latency.items()):
+                lines.extend(histogram.render("http_request_duration_seconds", f'method="{method}",route="{route}"'))
+
+            lines.append("# HELP db_queries_per_request SQL statements executed per request.")
+            lines.append("# TYPE db_queries_per_request histogram")
+            for (method, route), histogram in sorted(self.queries.items()):
+                lines.extend(histogram.render("db_queries_per_request", f'method="{method}",route="{route}"'))
+
+            lines.append("# HELP db_query_seconds_total Time spent in SQL statements by route.")
+            lines.append("# TYPE db_query_seconds_total counter")
+            for (method, route), seconds in sorted(self.query_seconds.items()):
+                lines.append(f'db_query_seconds_total{{method="{method}",route="{route}"}} {seconds}')
+
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def render_prometheus() -> str:
+    """
+    Request metrics plus the auth cache, order writer and store engine
+    counters.
+    """
+    from .auth_cache import auth_cache_stats
+    from .order_queue import order_writer
+    from .stores import store_registry
+
+    lines = [registry.render().rstrip("\n")]
+    caches = auth_cache_stats()
+    for field, help_text in (("hits", "Auth cache hits."), ("misses", "Auth cache misses.")):
+        lines.append(f"# HELP auth_cache_{field}_total {help_text}")
+        lines.append(f"# TYPE auth_cache_{field}_total counter")
+        for cache, stats in caches.items():
+            lines.append(f'auth_cache_{field}_total{{cache="{cache}"}} {stats[field]}')
+
+    for name, kind, help_text, value in (
+        ("order_queue_depth", "gauge", "Orders accepted but not yet written.", order_writer.depth),
+        ("order_batches_total", "counter", "Write-behind batches committed.", order_writer.batches),
+        ("order_batch_orders_total", "counter", "Orders written by the write-behind writer.", order_writer.written),
+        ("order_batch_failures_total", "counter", "Queued orders that could not be written.", order_writer.failures),
+        ("store_engines_open", "gauge", "Store database engines open in this worker.", len(store_registry.open_stores)),
+        ("store_engines_evicted_total", "counter", "Store engines closed to stay within STORE_ENGINES_MAX.", store_registry.evicted),
+    ):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+# ===============================
+# SAMPLING PROFILER
+# ===============================
+class SamplingProfiler:
+    """
+    Profiles roughly `sample_rate` of requests with cProfile.
+
+    cProfile hooks the whole event loop thread, not the request's
+    coroutine, so a report is approximate: while the sampled request
+    awaits, whatever other requests run on the loop is counted too, and
+    sync endpoints running in the threadpool are not seen at all.
+    `seconds` is the request's wall time. Only one profile runs at a
+    time, so reports at least never overlap each other. (Server-Timing
+    and the SQL counters above are exact per request.)
+    """
+
+    def __init__(self, sample_rate: float, keep: int = 20, top: int = 30):
+        self.sample_rate = sample_rate
+        self.top = top
+        self.reports: Deque[dict] = deque(maxlen=keep)
+        self._busy = threading.Lock()
+
+    def maybe_start(self) -> Optional[cProfile.Profile]:
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return None
+        if not self._busy.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler (e.g. a debugger) is already active
+            self._busy.release()
+            return None
+        return profiler
+
+    def finish(self, profiler: cProfile.Profile, method: str, route: str, seconds: float) -> None:
+        profiler.disable()
+        self._busy.release()
+
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(self.top)
+        self.reports.append({
+            "method": method,
+            "route": route,
+            "seconds": round(seconds, 6),
+            "at": time.time(),
+            "stats": output.getvalue(),
+        })
+
+
+profiler = SamplingProfiler(config.PROFILE_SAMPLE_RATE)
+
+
+# ===============================
+# MIDDLEWARE
+# ===============================
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware overhead).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_request.set(stats)
+        request_profiler = profiler.maybe_start()
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'app;dur={elapsed_ms:.2f}, '
+                    f'db;dur={stats.query_seconds * 1000:.2f};desc="{stats.queries} queries"'
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - start
+            route = scope.get("route")
+            # Route templates only, so label cardinality stays bounded
+            route_path = getattr(route, "path", None) or "unmatched"
+            if request_profiler is not None:
+                profiler.finish(request_profiler, scope["method"], route_path, elapsed)
+            registry.observe(scope["method"], route_path, status_code, elapsed, stats)
+            _current_request.reset(token)
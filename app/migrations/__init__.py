@@ -0,0 +1,195 @@
+# app/migrations/__init__.py
+"""
+Versioned schema migrations.
+
+Each `vNNNN_<name>.py` module in this package defines `revision`, a
+docstring describing the change, and `upgrade(conn)` / `downgrade(conn)`.
+Applied revisions are recorded in the `schema_version` table. Every
+migration runs in its own transaction together with its version row.
+
+The app never changes the schema itself: at startup it only checks
+that the database is at head (verify_schema). Upgrade before starting
+(or restarting) the workers:
+
+    python -m app.migrations upgrade
+    python -m app.migrations downgrade 3
+    python -m app.migrations current
+    python -m app.migrations history
+
+Migrations also adopt databases created by the old create_all() boot,
+so they check for existing tables, columns and indexes before adding
+them. Store databases (app/stores.py) run the same migrations; the few
+that differ per kind of database check is_store_database(conn).
+"""
+
+import importlib
+import pkgutil
+import re
+from datetime import datetime
+from types import ModuleType
+from typing import Callable, List, Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, delete, func, inspect, select
+from sqlalchemy.engine import Connection, Engine
+
+SCHEMA_VERSION_TABLE = "schema_version"
+
+_metadata = MetaData()
+
+schema_version = Table(
+    SCHEMA_VERSION_TABLE,
+    _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+
+# ===============================
+# DISCOVERY
+# ===============================
+_MODULE_NAME = re.compile(r"^v(\d{4})_\w+$")
+
+
+def load_migrations() -> List[ModuleType]:
+    """
+    All migration modules, ordered by revision.
+    """
+    modules = []
+    for info in pkgutil.iter_modules(__path__):
+        match = _MODULE_NAME.match(info.name)
+        if not match:
+            continue
+        module = importlib.import_module(f"{__name__}.{info.name}")
+        if module.revision != int(match.group(1)):
+            raise SchemaVersionError(f"{info.name} declares revision {module.revision}")
+        modules.append(module)
+    modules.sort(key=lambda module: module.revision)
+    return modules
+
+
+def describe(module: ModuleType) -> str:
+    """
+    First line of the migration's docstring.
+    """
+    return (module.__doc__ or module.__name__).strip().splitlines()[0]
+
+
+def head() -> int:
+    migrations = load_migrations()
+    return migrations[-1].revision if migrations else 0
+
+
+# ===============================
+# INTROSPECTION HELPERS (for migration modules)
+# ===============================
+def has_table(conn: Connection, table: str) -> bool:
+    return inspect(conn).has_table(table)
+
+
+def has_column(conn: Connection, table: str, column: str) -> bool:
+    return any(c["name"] == column for c in inspect(conn).get_columns(table))
+
+
+def has_index(conn: Connection, table: str, index: str) -> bool:
+    return any(i["name"] == index for i in inspect(conn).get_indexes(table))
+
+
+def is_store_database(conn: Connection) -> bool:
+    """
+    True while migrating a store's database rather than the main one.
+    """
+    return conn.info.get("store") is not None
+
+
+# ===============================
+# VERSIONING
+# ===============================
+def current_version(conn: Connection) -> int:
+    if not has_table(conn, SCHEMA_VERSION_TABLE):
+        return 0
+    return conn.scalar(select(func.max(schema_version.c.version))) or 0
+
+
+def upgrade(
+    engine: Engine,
+    target: Optional[int] = None,
+    log: Callable[[str], None] = lambda message: None,
+    store: Optional[str] = None
+) -> int:
+    """
+    Apply every migration above the current version up to `target`
+    (default: head). `store` names the store whose database `engine`
+    is (None = main database). Returns the resulting version.
+    """
+    with engine.begin() as conn:
+        _metadata.create_all(conn)
+        version = current_version(conn)
+
+    for module in load_migrations():
+        if module.revision <= version or (target is not None and module.revision > target):
+            continue
+        with engine.begin() as conn:
+            conn.info["store"] = store
+            module.upgrade(conn)
+            conn.execute(schema_version.insert().values(
+                version=module.revision,
+                description=describe(module),
+                applied_at=datetime.utcnow()
+            ))
+        version = module.revision
+        log(f"Upgraded to {version:04d}: {describe(module)}")
+
+    return version
+
+
+def downgrade(
+    engine: Engine,
+    target: int,
+    log: Callable[[str], None] = lambda message: None,
+    store: Optional[str] = None
+) -> int:
+    """
+    Revert applied migrations down to (and excluding) `target`.
+    Returns the resulting version.
+    """
+    with engine.connect() as conn:
+        version = current_version(conn)
+
+    for module in reversed(load_migrations()):
+        if module.revision > version or module.revision <= target:
+            continue
+        with engine.begin() as conn:
+            conn.info["store"] = store
+            module.downgrade(conn)
+            conn.execute(delete(schema_version).where(schema_version.c.version == module.revision))
+        version = module.revision - 1
+        log(f"Downgraded {module.revision:04d}: {describe(module)}")
+
+    return version
+
+
+def verify_schema(engine: Engine) -> int:
+    """
+    Startup check: a single indexed read instead of create_all()'s
+    per-table reflection. Raises SchemaVersionError if the database
+    isn't at the revision this code expects.
+    """
+    expected = head()
+    with engine.connect() as conn:
+        version = current_version(conn)
+
+    if version != expected:
+        hint = (
+            "run `python -m app.migrations upgrade`"
+            if version < expected
+            else "the database is newer than this code; deploy the matching release"
+        )
+        raise SchemaVersionError(
+            f"Database schema is at version {version}, expected {expected}: {hint}"
+        )
+    return version
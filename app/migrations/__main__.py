@@ -0,0 +1,80 @@
+# app/migrations/__main__.py
+"""
+python -m app.migrations [--store STORE | --all-stores] upgrade [REVISION]
+python -m app.migrations [--store STORE | --all-stores] downgrade REVISION
+python -m app.migrations [--store STORE | --all-stores] current
+python -m app.migrations history
+
+Without --store the main database (DATABASE_URL) is migrated;
+--all-stores migrates it and every store in STORES.
+"""
+
+import argparse
+import sys
+
+from .. import config
+from ..stores import store_engine
+from . import current_version, describe, downgrade, head, load_migrations, upgrade
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m app.migrations", description="Database schema migrations")
+    targets = parser.add_mutually_exclusive_group()
+    targets.add_argument("--store", help="migrate this store's database instead of the main one")
+    targets.add_argument("--all-stores", action="store_true", help="the main database and every store in STORES")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    up = commands.add_parser("upgrade", help="apply migrations (default: up to head)")
+    up.add_argument("revision", nargs="?", type=int)
+
+    down = commands.add_parser("downgrade", help="revert migrations above REVISION")
+    down.add_argument("revision", type=int)
+
+    commands.add_parser("current", help="show the database's schema version")
+    commands.add_parser("history", help="list all migrations")
+
+    args = parser.parse_args()
+
+    if args.store and args.store not in config.STORES:
+        parser.error(f"unknown store '{args.store}' (STORES={','.join(config.STORES)})")
+    stores = [None, *config.STORES] if args.all_stores else [args.store]
+
+    behind = False
+    for store in stores:
+        if len(stores) > 1:
+            print(f"[{store or 'main'}]")
+        engine = store_engine(store)
+        try:
+            behind |= run(args, engine, store)
+        finally:
+            engine.dispose()
+    if behind:
+        sys.exit(1)
+
+
+def run(args, engine, store) -> bool:
+    """
+    Runs the command on one database; True if `current` found it behind.
+    """
+    if args.command == "upgrade":
+        version = upgrade(engine, args.revision, log=print, store=store)
+        print(f"✅ Schema at version {version} (head {head()})")
+    elif args.command == "downgrade":
+        version = downgrade(engine, args.revision, log=print, store=store)
+        print(f"✅ Schema at version {version}")
+    elif args.command == "current":
+        with engine.connect() as conn:
+            version = current_version(conn)
+        print(f"{version} (head {head()})")
+        return version != head()
+    else:
+        with engine.connect() as conn:
+            version = current_version(conn)
+        for module in load_migrations():
+            marker = "*" if module.revision <= version else " "
+            print(f"{marker} {module.revision:04d}  {describe(module)}")
+    return False
+
+
+if __name__ == "__main__":
+    main()
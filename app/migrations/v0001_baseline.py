@@ -0,0 +1,64 @@
+# app/migrations/v0001_baseline.py
+"""
+Baseline schema: users, menu items, orders and order items
+
+The tables as the original create_all() boot created them. Later
+revisions add to these; the definitions here must not change.
+"""
+
+from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, MetaData, String, Table
+
+revision = 1
+
+metadata = MetaData()
+
+Table(
+    "users",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("username", String, unique=True, index=True, nullable=False),
+    Column("password_hash", String, nullable=False),
+    Column("role", String, nullable=False),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "menu_items",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, unique=True, nullable=False),
+    Column("description", String),
+    Column("price", Float, nullable=False),
+    Column("category", String),
+    Column("is_available", Boolean),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "orders",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True),
+    Column("total_amount", Float),
+    Column("status", String),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "order_items",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("order_id", Integer, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False),
+    Column("menu_item_id", Integer, ForeignKey("menu_items.id"), nullable=False),
+    Column("quantity", Integer, nullable=False),
+    Column("unit_price", Float, nullable=False),
+)
+
+
+def upgrade(conn):
+    # checkfirst: databases from the create_all() era already have these
+    metadata.create_all(conn, checkfirst=True)
+
+
+def downgrade(conn):
+    metadata.drop_all(conn, checkfirst=True)
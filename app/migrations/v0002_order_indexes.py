@@ -0,0 +1,39 @@
+# app/migrations/v0002_order_indexes.py
+"""
+Order indexes, optimistic locking version and write-behind tickets
+
+- orders.version (status changes, see ORDER_TRANSITIONS) and
+  orders.ticket (write-behind ingestion)
+- composite indexes for keyset pagination of order history, the
+  kitchen queue and the admin listing, plus order_items.order_id
+"""
+
+from . import has_column
+
+revision = 2
+
+INDEXES = {
+    "ix_orders_user_id_created_at": "orders (user_id, created_at)",
+    "ix_orders_status_created_at": "orders (status, created_at)",
+    "ix_orders_created_at": "orders (created_at, id)",
+    "ix_order_items_order_id": "order_items (order_id)",
+}
+
+
+def upgrade(conn):
+    if not has_column(conn, "orders", "version"):
+        conn.exec_driver_sql("ALTER TABLE orders ADD COLUMN version INTEGER DEFAULT '1' NOT NULL")
+    if not has_column(conn, "orders", "ticket"):
+        conn.exec_driver_sql("ALTER TABLE orders ADD COLUMN ticket VARCHAR(36)")
+
+    for name, target in INDEXES.items():
+        conn.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+    conn.exec_driver_sql("CREATE UNIQUE INDEX IF NOT EXISTS ix_orders_ticket ON orders (ticket)")
+
+
+def downgrade(conn):
+    for name in [*INDEXES, "ix_orders_ticket"]:
+        conn.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+    # Needs SQLite 3.35+
+    conn.exec_driver_sql("ALTER TABLE orders DROP COLUMN ticket")
+    conn.exec_driver_sql("ALTER TABLE orders DROP COLUMN version")
@@ -0,0 +1,27 @@
+# app/migrations/v0004_menu_search.py
+"""
+Menu search: category / availability index and FTS5 table
+
+The FTS5 table and its sync triggers are SQLite-only (see
+app/search.py); elsewhere search keeps using LIKE.
+"""
+
+from ..search import MENU_FTS_TABLE, install_menu_fts
+
+revision = 4
+
+
+def upgrade(conn):
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_menu_items_category_is_available "
+        "ON menu_items (category, is_available)"
+    )
+    install_menu_fts(conn)
+
+
+def downgrade(conn):
+    if conn.dialect.name == "sqlite":
+        for trigger in ("menu_items_fts_ai", "menu_items_fts_ad", "menu_items_fts_au"):
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {trigger}")
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {MENU_FTS_TABLE}")
+    conn.exec_driver_sql("DROP INDEX IF EXISTS ix_menu_items_category_is_available")
@@ -0,0 +1,35 @@
+# app/migrations/v0005_money_cents.py
+"""
+Store money as integer cents
+
+Replaces each Float money column with an Integer `<name>_cents`
+column holding the rounded value, so totals and report aggregates
+are exact.
+"""
+
+revision = 5
+
+# (table, float column, cents column)
+MONEY_COLUMNS = [
+    ("menu_items", "price", "price_cents"),
+    ("orders", "total_amount", "total_amount_cents"),
+    ("order_items", "unit_price", "unit_price_cents"),
+    ("sales_hourly", "revenue", "revenue_cents"),
+    ("item_sales_daily", "revenue", "revenue_cents"),
+]
+
+
+def upgrade(conn):
+    for table, amount, cents in MONEY_COLUMNS:
+        conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {cents} INTEGER DEFAULT '0' NOT NULL")
+        conn.exec_driver_sql(
+            f"UPDATE {table} SET {cents} = CAST(ROUND(COALESCE({amount}, 0) * 100) AS INTEGER)"
+        )
+        conn.exec_driver_sql(f"ALTER TABLE {table} DROP COLUMN {amount}")
+
+
+def downgrade(conn):
+    for table, amount, cents in MONEY_COLUMNS:
+        conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {amount} FLOAT DEFAULT '0' NOT NULL")
+        conn.exec_driver_sql(f"UPDATE {table} SET {amount} = {cents} / 100.0")
+        conn.exec_driver_sql(f"ALTER TABLE {table} DROP COLUMN {cents}")
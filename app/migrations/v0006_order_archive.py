@@ -0,0 +1,43 @@
+# app/migrations/v0006_order_archive.py
+"""
+Order archive segment index
+
+Tables describing the compressed order segments written by
+`python -m app.archive`.
+"""
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, MetaData, String, Table
+
+revision = 6
+
+metadata = MetaData()
+
+Table(
+    "archive_segments",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("file_name", String, unique=True, nullable=False),
+    Column("first_created_at", DateTime, nullable=False),
+    Column("last_created_at", DateTime, nullable=False, index=True),
+    Column("order_count", Integer, nullable=False),
+    Column("archived_at", DateTime),
+)
+
+Table(
+    "archive_segment_users",
+    metadata,
+    Column("segment_id", Integer, ForeignKey("archive_segments.id", ondelete="CASCADE"), primary_key=True),
+    Column("user_id", Integer, primary_key=True),
+    Column("first_created_at", DateTime, nullable=False),
+    Column("last_created_at", DateTime, nullable=False),
+    Column("order_count", Integer, nullable=False),
+    Index("ix_archive_segment_users_user_id_last_created_at", "user_id", "last_created_at"),
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
+
+
+def downgrade(conn):
+    metadata.drop_all(conn, checkfirst=True)
@@ -0,0 +1,19 @@
+# app/migrations/v0007_menu_stock.py
+"""
+Menu item stock counts
+
+menu_items.stock (NULL = not tracked), decremented by order placement.
+"""
+
+from . import has_column
+
+revision = 7
+
+
+def upgrade(conn):
+    if not has_column(conn, "menu_items", "stock"):
+        conn.exec_driver_sql("ALTER TABLE menu_items ADD COLUMN stock INTEGER")
+
+
+def downgrade(conn):
+    conn.exec_driver_sql("ALTER TABLE menu_items DROP COLUMN stock")
@@ -0,0 +1,29 @@
+# app/migrations/v0008_order_events.py
+"""
+Order events table
+
+Kitchen display events shared by all server workers (app/events.py).
+"""
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, Text
+
+revision = 8
+
+metadata = MetaData()
+
+Table(
+    "order_events",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("event", String, nullable=False),
+    Column("payload", Text, nullable=False),
+    Column("created_at", DateTime),
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
+
+
+def downgrade(conn):
+    metadata.drop_all(conn, checkfirst=True)
@@ -0,0 +1,88 @@
+# app/migrations/v0009_store_orders_user_fk.py
+"""
+Drop the orders.user_id foreign key in store databases
+
+Accounts live in the main database (app/stores.py), so in a store's
+database the key pointed at a `users` table that is always empty and
+a backend enforcing it would reject every signed-in order. user_id
+there refers to the main database's users. The main database keeps
+the key.
+
+SQLite can't drop a constraint, so there `orders` is rebuilt.
+"""
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, MetaData, String, Table, inspect
+
+from . import is_store_database
+
+revision = 9
+
+ORDERS_COLUMNS = ["id", "user_id", "status", "created_at", "version", "ticket", "total_amount_cents"]
+
+ORDERS_INDEXES = [
+    "CREATE INDEX ix_orders_id ON orders (id)",
+    "CREATE INDEX ix_orders_user_id_created_at ON orders (user_id, created_at)",
+    "CREATE INDEX ix_orders_status_created_at ON orders (status, created_at)",
+    "CREATE INDEX ix_orders_created_at ON orders (created_at, id)",
+    "CREATE UNIQUE INDEX ix_orders_ticket ON orders (ticket)",
+]
+
+
+def _rebuild_orders(conn, user_fk: bool) -> None:
+    metadata = MetaData()
+    Table("users", metadata, Column("id", Integer, primary_key=True))
+    rebuilt = Table(
+        "orders_rebuilt",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column(
+            "user_id",
+            Integer,
+            *([ForeignKey("users.id", ondelete="SET NULL")] if user_fk else []),
+            nullable=True
+        ),
+        Column("status", String),
+        Column("created_at", DateTime),
+        Column("version", Integer, nullable=False, server_default="1"),
+        Column("ticket", String(36)),
+        Column("total_amount_cents", Integer, nullable=False, server_default="0"),
+    )
+    rebuilt.create(conn)
+
+    columns = ", ".join(ORDERS_COLUMNS)
+    conn.exec_driver_sql(f"INSERT INTO orders_rebuilt ({columns}) SELECT {columns} FROM orders")
+    # Foreign keys aren't enforced on the app's SQLite connections, so
+    # order_items (which references `orders` by name) is left alone
+    conn.exec_driver_sql("DROP TABLE orders")
+    conn.exec_driver_sql("ALTER TABLE orders_rebuilt RENAME TO orders")
+    for statement in ORDERS_INDEXES:
+        conn.exec_driver_sql(statement)
+
+
+def _user_fk_names(conn):
+    return [
+        fk["name"] for fk in inspect(conn).get_foreign_keys("orders")
+        if fk["referred_table"] == "users"
+    ]
+
+
+def upgrade(conn):
+    if not is_store_database(conn) or not _user_fk_names(conn):
+        return
+    if conn.dialect.name == "sqlite":
+        _rebuild_orders(conn, user_fk=False)
+    else:
+        for name in _user_fk_names(conn):
+            conn.exec_driver_sql(f"ALTER TABLE orders DROP CONSTRAINT {name}")
+
+
+def downgrade(conn):
+    if not is_store_database(conn) or _user_fk_names(conn):
+        return
+    if conn.dialect.name == "sqlite":
+        _rebuild_orders(conn, user_fk=True)
+    else:
+        conn.exec_driver_sql(
+            "ALTER TABLE orders ADD CONSTRAINT orders_user_id_fkey "
+            "FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE SET NULL"
+        )
@@ -4,15 +4,19 @@ from sqlalchemy import (
     Column,
     Integer,
     String,
-    Float,
     Boolean,
     ForeignKey,
-    DateTime
+    DateTime,
+    Date,
+    Index,
+    Text
 )
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
 from .database import Base
+from .money import from_cents, to_cents
 
 # ======================
 # USERS TABLE
@@ -43,36 +47,76 @@ class MenuItem(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, nullable=False)
     description = Column(String, default="")
-    price = Column(Float, nullable=False)
+    # Money columns are integer cents (see app/money.py)
+    price_cents = Column(Integer, nullable=False, server_default="0")
     category = Column(String, default="General")
     is_available = Column(Boolean, default=True)
+    # Units left; NULL = not tracked (see app/stock.py)
+    stock = Column(Integer)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    @hybrid_property
+    def price(self):
+        return from_cents(self.price_cents)
+
+    @price.setter
+    def price(self, value):
+        self.price_cents = to_cents(value)
+
     # One menu item → many order items
     order_items = relationship(
         "OrderItem",
         back_populates="menu_item"
     )
 
+    # Backs category / availability filtering of GET /menu/
+    __table_args__ = (
+        Index("ix_menu_items_category_is_available", "category", "is_available"),
+    )
+
 
 # ======================
 # ORDERS TABLE
 # ======================
+# Order lifecycle: pending → preparing → ready → paid, or cancelled
+# before payment
+ORDER_STATUS_PENDING = "pending"
+ORDER_STATUS_CANCELLED = "cancelled"
+
+ORDER_TRANSITIONS = {
+    "pending": {"preparing", "cancelled"},
+    "preparing": {"ready", "cancelled"},
+    "ready": {"paid", "cancelled"},
+    "paid": set(),
+    "cancelled": set(),
+}
+
+
 class Order(Base):
     __tablename__ = "orders"
 
     id = Column(Integer, primary_key=True, index=True)
 
-    # Nullable → allows guest orders
+    # Nullable → allows guest orders. Store databases have no foreign
+    # key here: their orders point at main-database users (v0009)
     user_id = Column(
         Integer,
         ForeignKey("users.id", ondelete="SET NULL"),
         nullable=True
     )
 
-    total_amount = Column(Float, default=0.0)
-    status = Column(String, default="pending")  # pending / paid
+    total_amount_cents = Column(Integer, nullable=False, server_default="0")
+    status = Column(String, default=ORDER_STATUS_PENDING)  # see ORDER_TRANSITIONS
+    # Bumped on every status change (optimistic concurrency)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Assigned when the order is accepted through the write-behind
+    # queue (see app/order_queue.py); null for synchronous orders
+    ticket = Column(String(36), unique=True, index=True, nullable=True)
+
+    @hybrid_property
+    def total_amount(self):
+        return from_cents(self.total_amount_cents)
 
     # Relationships
     user = relationship(
@@ -86,6 +130,14 @@ class Order(Base):
         cascade="all, delete-orphan"
     )
 
+    # Composite indexes backing keyset pagination of order history
+    __table_args__ = (
+        Index("ix_orders_user_id_created_at", "user_id", "created_at"),
+        Index("ix_orders_status_created_at", "status", "created_at"),
+        # Unfiltered admin listing (newest first)
+        Index("ix_orders_created_at", "created_at", "id"),
+    )
+
 
 # ======================
 # ORDER ITEMS TABLE
@@ -98,7 +150,8 @@ class OrderItem(Base):
     order_id = Column(
         Integer,
         ForeignKey("orders.id", ondelete="CASCADE"),
-        nullable=False
+        nullable=False,
+        index=True
     )
 
     menu_item_id = Column(
@@ -108,7 +161,7 @@ class OrderItem(Base):
     )
 
     quantity = Column(Integer, nullable=False)
-    unit_price = Column(Float, nullable=False)
+    unit_price_cents = Column(Integer, nullable=False, server_default="0")
 
     # Relationships
     order = relationship(
@@ -120,3 +173,103 @@ class OrderItem(Base):
         "MenuItem",
         back_populates="order_items"
     )
+
+    @hybrid_property
+    def unit_price(self):
+        return from_cents(self.unit_price_cents)
+
+
+# ======================
+# SALES ROLLUP TABLES
+# Maintained incrementally by create_order (see app/rollups.py)
+# ======================
+class SalesHourly(Base):
+    __tablename__ = "sales_hourly"
+
+    # Start of the UTC hour
+    bucket_start = Column(DateTime, primary_key=True)
+    day = Column(Date, nullable=False, index=True)
+
+    order_count = Column(Integer, nullable=False, default=0)
+    items_sold = Column(Integer, nullable=False, default=0)
+    revenue_cents = Column(Integer, nullable=False, server_default="0")
+
+
+class ItemSalesDaily(Base):
+    __tablename__ = "item_sales_daily"
+
+    day = Column(Date, primary_key=True)
+    menu_item_id = Column(Integer, primary_key=True)
+
+    # Denormalized at sale time so reports survive renames/deletes
+    name = Column(String, nullable=False)
+    category = Column(String, nullable=False)
+
+    quantity = Column(Integer, nullable=False, default=0)
+    revenue_cents = Column(Integer, nullable=False, server_default="0")
+
+
+# ======================
+# IDEMPOTENCY KEYS TABLE
+# Stored responses for retried POST /orders/ requests
+# ======================
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String, primary_key=True)
+    request_hash = Column(String, nullable=False)
+    status_code = Column(Integer, nullable=False)
+    response_body = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+# ======================
+# ORDER EVENTS TABLE
+# Kitchen display events, written with the change they describe and
+# tailed by every worker (see app/events.py); newest rows only
+# ======================
+class OrderEvent(Base):
+    __tablename__ = "order_events"
+
+    id = Column(Integer, primary_key=True)
+    event = Column(String, nullable=False)
+    # OrderResponse JSON
+    payload = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+# ======================
+# ORDER ARCHIVE INDEX
+# Closed orders moved out of `orders` live in gzip NDJSON segment
+# files (see app/archive.py); these tables say which segment holds
+# which dates and users, so reads open only the segments they need.
+# ======================
+class ArchiveSegment(Base):
+    __tablename__ = "archive_segments"
+
+    id = Column(Integer, primary_key=True)
+    # File name inside ARCHIVE_DIR
+    file_name = Column(String, unique=True, nullable=False)
+    first_created_at = Column(DateTime, nullable=False)
+    last_created_at = Column(DateTime, nullable=False, index=True)
+    order_count = Column(Integer, nullable=False)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ArchiveSegmentUser(Base):
+    __tablename__ = "archive_segment_users"
+
+    segment_id = Column(
+        Integer,
+        ForeignKey("archive_segments.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    user_id = Column(Integer, primary_key=True)
+
+    first_created_at = Column(DateTime, nullable=False)
+    last_created_at = Column(DateTime, nullable=False)
+    order_count = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_archive_segment_users_user_id_last_created_at", "user_id", "last_created_at"),
+    )
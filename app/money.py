@@ -0,0 +1,20 @@
+# app/money.py
+"""
+Money is stored as integer cents so sums are exact, in Python and in
+SQL alike. The API keeps speaking decimal amounts (e.g. 2.5); convert
+at the edges with to_cents() / from_cents().
+"""
+
+from decimal import ROUND_HALF_UP, Decimal
+
+
+def to_cents(amount) -> int:
+    """
+    2.345 -> 235 (half-up, via the decimal string so 0.1-style floats
+    don't round the wrong way).
+    """
+    return int((Decimal(str(amount)) * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents) -> float:
+    return cents / 100
@@ -0,0 +1,317 @@
+# app/order_queue.py
+"""
+Write-behind ingestion for POST /orders/ (ORDER_WRITE_BEHIND=true).
+
+create_order validates the order against the cached menu, gives it a
+ticket and hands it to OrderWriter, then answers 202 Accepted. One
+background task drains the queue and commits up to ORDER_BATCH_MAX_SIZE
+orders per transaction, so SQLite's writer lock and the WAL sync are
+paid once per batch instead of once per order.
+
+If a batch fails to commit, its orders are retried one transaction at
+a time so a single bad order only fails its own ticket. That includes
+stock: every order's conditional decrements (app/stock.py) run in the
+batch transaction, and an order that finds an item sold out fails the
+batch, then its own ticket on the retry.
+
+Batches are split by store (app/stores.py) and each store's orders are
+committed to its own database.
+
+Accepted orders live in memory until their batch commits: a crash loses
+at most ORDER_BATCH_MAX_DELAY_MS worth of orders, and stop() drains the
+queue on a clean shutdown.
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from fastapi import HTTPException, Response, status
+
+from . import config
+from .events import order_broker_for, record_events
+from .idempotency import store_response
+from .menu_cache import menu_cache_for
+from .models import MenuItem, Order, OrderItem
+from .rollups import rollup_upserts
+from .schemas import OrderResponse
+from .stock import OutOfStock, take_stock
+from .stores import session_for
+
+logger = logging.getLogger(__name__)
+
+# Failed tickets remembered for status polling
+FAILED_TICKETS_KEPT = 10000
+# Shown for failures other than stock (the cause is logged instead)
+ORDER_FAILED_DETAIL = "The order could not be saved, please place it again"
+
+
+class OrderQueueFull(Exception):
+    pass
+
+
+@dataclass
+class QueuedOrder:
+    ticket: str
+    user_id: Optional[int]
+    total_cents: int
+    # (menu_item_id, quantity, unit_price_cents)
+    lines: List[Tuple[int, int, int]]
+    menu_items: Mapping[int, MenuItem]
+    # Quantity per stock-tracked menu item
+    stock: Mapping[int, int] = field(default_factory=dict)
+    # Store database the order belongs to (None = main database)
+    store: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    # (key, fingerprint, accepted response body)
+    idempotency: Optional[Tuple[str, str, str]] = None
+
+    def build(self) -> Order:
+        # Fresh ORM objects per attempt; a rolled back batch leaves its
+        # instances in an unusable state
+        return Order(
+            user_id=self.user_id,
+            total_amount_cents=self.total_cents,
+            created_at=self.created_at,
+            ticket=self.ticket,
+            items=[
+                OrderItem(menu_item_id=menu_item_id, quantity=quantity, unit_price_cents=unit_price_cents)
+                for menu_item_id, quantity, unit_price_cents in self.lines
+            ]
+        )
+
+
+class OrderWriter:
+    """
+    Group-commits queued orders from a single background task.
+
+    Must be used from one event loop; the task is started by the first
+    submit() and stopped (after draining) by stop().
+    """
+
+    def __init__(self, max_batch: int, max_delay: float, max_pending: int):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop = None
+
+        self._queued: Dict[str, QueuedOrder] = {}
+        self._failed: "OrderedDict[str, Tuple[QueuedOrder, str]]" = OrderedDict()
+        # Idempotency keys of queued orders, so a quick retry doesn't
+        # enqueue the order twice before the key reaches the database
+        self._keys: Dict[Tuple[Optional[str], str], QueuedOrder] = {}
+
+        self.batches = 0
+        self.written = 0
+        self.failures = 0
+
+    @property
+    def depth(self) -> int:
+        return len(self._queued)
+
+    # ===============================
+    # ACCEPTING ORDERS
+    # ===============================
+    def submit(self, queued: QueuedOrder) -> None:
+        if len(self._queued) >= self.max_pending:
+            raise OrderQueueFull()
+
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._start(loop)
+
+        self._queued[queued.ticket] = queued
+        if queued.idempotency:
+            self._keys[(queued.store, queued.idempotency[0])] = queued
+        self._queue.put_nowait(queued)
+
+    def replay(self, store: Optional[str], key: str, fingerprint: str) -> Optional[Response]:
+        """
+        Accepted response for an Idempotency-Key whose order is still
+        queued; 422 if the key was used for a different request.
+        """
+        queued = self._keys.get((store, key))
+        if queued is None:
+            return None
+        _, queued_fingerprint, body = queued.idempotency
+        if queued_fingerprint != fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                detail="Idempotency-Key was already used for a different request"
+            )
+        return Response(
+            content=body,
+            status_code=status.HTTP_202_ACCEPTED,
+            media_type="application/json",
+            headers={"Idempotent-Replayed": "true"}
+        )
+
+    def lookup(self, store: Optional[str], ticket: str) -> Tuple[Optional[QueuedOrder], Optional[str]]:
+        """
+        (order, None) while queued, (order, error) if it failed,
+        (None, None) if unknown here (written, accepted elsewhere or
+        for another store).
+        """
+        queued, error = self._queued.get(ticket), None
+        if queued is None and ticket in self._failed:
+            queued, error = self._failed[ticket]
+        if queued is None or queued.store != store:
+            return None, None
+        return queued, error
+
+    # ===============================
+    # BACKGROUND WRITER
+    # ===============================
+    def _start(self, loop) -> None:
+        """
+        (Re)start the writer task. Orders left in the queue of a task
+        that died are moved to the new queue; orders it had taken but
+        not finished may or may not have committed, so their tickets
+        fail (a committed one is still found by its ticket).
+        """
+        waiting: List[QueuedOrder] = []
+        if self._queue is not None:
+            while not self._queue.empty():
+                queued = self._queue.get_nowait()
+                if queued is not None:
+                    waiting.append(queued)
+
+        if self._task is not None and self._task.done() and not self._task.cancelled() and self._task.exception():
+            logger.error("Order writer stopped unexpectedly", exc_info=self._task.exception())
+        waiting_tickets = {queued.ticket for queued in waiting}
+        for queued in list(self._queued.values()):
+            if queued.ticket not in waiting_tickets:
+                self._fail(queued, ORDER_FAILED_DETAIL)
+
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        for queued in waiting:
+            self._queue.put_nowait(queued)
+        self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        queue = self._queue
+        while True:
+            first = await queue.get()
+            if first is None:
+                return
+            batch = [first]
+
+            # Collect more orders until the batch is full or the delay is up
+            deadline = asyncio.get_running_loop().time() + self.max_delay
+            stop = False
+            while len(batch) < self.max_batch:
+                try:
+                    queued = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - asyncio.get_running_loop().time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        queued = await asyncio.wait_for(queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if queued is None:
+                    stop = True
+                    break
+                batch.append(queued)
+
+            by_store: Dict[Optional[str], List[QueuedOrder]] = {}
+            for queued in batch:
+                by_store.setdefault(queued.store, []).append(queued)
+            for store_batch in by_store.values():
+                await self._write(store_batch)
+            if stop:
+                return
+
+    async def _write(self, batch: List[QueuedOrder]) -> None:
+        try:
+            orders = await self._commit(batch)
+        except Exception as exc:
+            if isinstance(exc, OutOfStock):
+                logger.info("Order batch of %d hit %s, retrying one by one", len(batch), exc)
+            else:
+                logger.exception("Order batch of %d failed, retrying one by one", len(batch))
+            orders = []
+            for queued in batch:
+                try:
+                    orders.extend(await self._commit([queued]))
+                except OutOfStock as exc:
+                    self._fail(queued, str(exc))
+                except Exception:
+                    logger.exception("Order %s could not be written", queued.ticket)
+                    self._fail(queued, ORDER_FAILED_DETAIL)
+
+        self.batches += 1
+        self.written += len(orders)
+        for queued, _ in orders:
+            self._forget(queued)
+        if orders:
+            order_broker_for(batch[0].store).wake()
+
+    async def _commit(self, batch: List[QueuedOrder]) -> List[Tuple[QueuedOrder, Order]]:
+        # One store per batch (see _run)
+        store = batch[0].store
+        async with session_for(store) as db:
+            sold_out = []
+            for queued in batch:
+                sold_out.extend(await take_stock(db, queued.stock))
+
+            orders = [(queued, queued.build()) for queued in batch]
+            db.add_all(order for _, order in orders)
+
+            menu_items: Dict[int, MenuItem] = {}
+            for queued in batch:
+                menu_items.update(queued.menu_items)
+            for stmt in rollup_upserts(db.bind.dialect.name, [order for _, order in orders], menu_items):
+                await db.execute(stmt)
+
+            for queued in batch:
+                if queued.idempotency:
+                    key, fingerprint, body = queued.idempotency
+                    await store_response(db, key, fingerprint, status.HTTP_202_ACCEPTED, body)
+
+            await db.flush()
+            await record_events(db, [
+                ("order.created", OrderResponse.model_validate(order, from_attributes=True).model_dump_json())
+                for _, order in orders
+            ])
+
+            await db.commit()
+            if sold_out:
+                menu_cache_for(store).bump()
+            return orders
+
+    def _fail(self, queued: QueuedOrder, error: str) -> None:
+        self.failures += 1
+        self._forget(queued)
+        self._failed[queued.ticket] = (queued, error)
+        while len(self._failed) > FAILED_TICKETS_KEPT:
+            self._failed.popitem(last=False)
+
+    def _forget(self, queued: QueuedOrder) -> None:
+        self._queued.pop(queued.ticket, None)
+        if queued.idempotency:
+            self._keys.pop((queued.store, queued.idempotency[0]), None)
+
+    async def stop(self) -> None:
+        """
+        Write everything still queued, then stop the writer task.
+        """
+        if self._task is None or self._task.done():
+            return
+        self._queue.put_nowait(None)
+        await self._task
+        self._task = None
+
+
+order_writer = OrderWriter(
+    max_batch=config.ORDER_BATCH_MAX_SIZE,
+    max_delay=config.ORDER_BATCH_MAX_DELAY_MS / 1000,
+    max_pending=config.ORDER_QUEUE_MAX_PENDING
+)
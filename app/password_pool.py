@@ -0,0 +1,59 @@
+# app/password_pool.py
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from . import config
+
+
+class PasswordPoolBusy(Exception):
+    """Raised when too many hash/verify jobs are already waiting."""
+
+
+class PasswordPool:
+    """
+    Small dedicated thread pool for argon2 work.
+
+    argon2-cffi releases the GIL while hashing, so a couple of threads
+    give real parallelism without touching the shared request
+    threadpool. Jobs beyond `max_pending` are rejected immediately
+    instead of queueing behind a login burst.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.max_pending = max_pending
+        self.pending = 0
+        self._workers = workers
+        self._executor = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._workers,
+                thread_name_prefix="password-hash"
+            )
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        # Single event loop thread: check-and-increment can't interleave
+        if self.pending >= self.max_pending:
+            raise PasswordPoolBusy()
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_pool = PasswordPool(
+    config.PASSWORD_HASH_WORKERS,
+    config.PASSWORD_HASH_MAX_PENDING
+)
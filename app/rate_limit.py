@@ -0,0 +1,81 @@
+# app/rate_limit.py
+
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from . import config
+
+
+class FailureLimiter:
+    """
+    Fixed-window counter of failures per key.
+
+    blocked() returns the seconds until the key's window resets once it
+    has used up `max_failures`, else None.
+    """
+
+    # Stale windows are pruned once the table grows past this
+    MAX_KEYS = 10000
+
+    def __init__(self, max_failures: int, window: int):
+        self.max_failures = max_failures
+        self.window = window
+        self._windows: Dict[str, Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    def blocked(self, key: str) -> Optional[int]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._windows.get(key)
+            if not entry or now - entry[0] >= self.window:
+                return None
+            if entry[1] < self.max_failures:
+                return None
+            return max(1, int(entry[0] + self.window - now))
+
+    def record_failure(self, key: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            start, count = self._windows.get(key, (now, 0))
+            if now - start >= self.window:
+                start, count = now, 0
+            self._windows[key] = (start, count + 1)
+            if len(self._windows) > self.MAX_KEYS:
+                self._prune(now)
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._windows.pop(key, None)
+
+    def _prune(self, now: float) -> None:
+        for key in [k for k, (start, _) in self._windows.items() if now - start >= self.window]:
+            del self._windows[key]
+
+
+class LoginLimiter:
+    """
+    Failed-login limits per username and per client IP.
+    """
+
+    def __init__(self, per_user: int, per_ip: int, window: int):
+        self.users = FailureLimiter(per_user, window)
+        self.ips = FailureLimiter(per_ip, window)
+
+    def blocked(self, username: str, ip: str) -> Optional[int]:
+        waits = [w for w in (self.users.blocked(username), self.ips.blocked(ip)) if w]
+        return max(waits) if waits else None
+
+    def record_failure(self, username: str, ip: str) -> None:
+        self.users.record_failure(username)
+        self.ips.record_failure(ip)
+
+    def record_success(self, username: str) -> None:
+        self.users.reset(username)
+
+
+login_limiter = LoginLimiter(
+    config.LOGIN_MAX_FAILURES_PER_USER,
+    config.LOGIN_MAX_FAILURES_PER_IP,
+    config.LOGIN_WINDOW_SECONDS
+)
@@ -0,0 +1,213 @@
+# app/rollups.py
+"""
+Incremental sales rollups.
+
+create_order adds each order's contribution to `sales_hourly` and
+`item_sales_daily` in the same transaction as the order itself, so
+/reports/ never has to scan `orders` or `order_items`.
+
+Backfill or recompute from scratch with:
+
+    python -m app.rollups
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Mapping
+
+from sqlalchemy import Date, String, cast, delete, distinct, func, select
+from sqlalchemy.orm import Session
+
+from .models import ItemSalesDaily, MenuItem, Order, OrderItem, SalesHourly, ORDER_STATUS_CANCELLED
+
+
+# Archived orders are added back through rollup_upserts in batches
+ARCHIVE_BATCH_SIZE = 1000
+
+
+def _insert(dialect_name: str):
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def rollup_upserts(
+    dialect_name: str,
+    orders: Iterable[Order],
+    menu_items: Mapping[int, MenuItem],
+    sign: int = 1
+) -> List:
+    """
+    Build at most two INSERT ... ON CONFLICT DO UPDATE statements adding
+    `orders` to the rollup tables (sign=-1 takes cancelled orders back
+    out). Orders must have created_at set and their items loaded.
+    """
+    hourly: Dict = defaultdict(lambda: {"order_count": 0, "items_sold": 0, "revenue_cents": 0})
+    items: Dict = defaultdict(lambda: {"quantity": 0, "revenue_cents": 0})
+
+    for order in orders:
+        bucket_start = order.created_at.replace(minute=0, second=0, microsecond=0)
+        bucket = hourly[bucket_start]
+        bucket["order_count"] += sign
+        bucket["revenue_cents"] += sign * order.total_amount_cents
+
+        for order_item in order.items:
+            bucket["items_sold"] += sign * order_item.quantity
+            line = items[(bucket_start.date(), order_item.menu_item_id)]
+            line["quantity"] += sign * order_item.quantity
+            line["revenue_cents"] += sign * order_item.unit_price_cents * order_item.quantity
+
+    if not hourly:
+        return []
+
+    insert = _insert(dialect_name)
+    statements = []
+
+    stmt = insert(SalesHourly).values([
+        {"bucket_start": bucket_start, "day": bucket_start.date(), **totals}
+        for bucket_start, totals in hourly.items()
+    ])
+    statements.append(stmt.on_conflict_do_update(
+        index_elements=[SalesHourly.bucket_start],
+        set_={
+            "order_count": SalesHourly.order_count + stmt.excluded.order_count,
+            "items_sold": SalesHourly.items_sold + stmt.excluded.items_sold,
+            "revenue_cents": SalesHourly.revenue_cents + stmt.excluded.revenue_cents,
+        }
+    ))
+
+    if items:
+        rows = []
+        for (day, menu_item_id), totals in items.items():
+            menu_item = menu_items.get(menu_item_id)
+            rows.append({
+                "day": day,
+                "menu_item_id": menu_item_id,
+                "name": menu_item.name if menu_item else f"Item {menu_item_id}",
+                "category": (menu_item.category if menu_item else None) or "General",
+                **totals,
+            })
+        stmt = insert(ItemSalesDaily).values(rows)
+        set_ = {
+            "quantity": ItemSalesDaily.quantity + stmt.excluded.quantity,
+            "revenue_cents": ItemSalesDaily.revenue_cents + stmt.excluded.revenue_cents,
+        }
+        if sign > 0:
+            # Only sales refresh the denormalized name / category
+            set_["name"] = stmt.excluded.name
+            set_["category"] = stmt.excluded.category
+        statements.append(stmt.on_conflict_do_update(
+            index_elements=[ItemSalesDaily.day, ItemSalesDaily.menu_item_id],
+            set_=set_
+        ))
+
+    return statements
+
+
+def _hour_bucket(dialect_name: str, column):
+    """
+    SQL for the start of the hour of `column`, stored the same way
+    SalesHourly.bucket_start is.
+    """
+    if dialect_name == "postgresql":
+        return func.date_trunc("hour", column)
+    return func.strftime("%Y-%m-%d %H:00:00.000000", column)
+
+
+def _day(dialect_name: str, column):
+    if dialect_name == "postgresql":
+        return cast(column, Date)
+    return func.date(column)
+
+
+def rebuild_rollups(db: Session) -> int:
+    """
+    Recompute both rollup tables from the orders table with two
+    INSERT ... SELECT aggregates (SUM(quantity * unit_price_cents)),
+    then add archived orders. Returns the number of orders processed.
+    """
+    dialect_name = db.get_bind().dialect.name
+    live = Order.status != ORDER_STATUS_CANCELLED
+
+    db.execute(delete(SalesHourly))
+    db.execute(delete(ItemSalesDaily))
+
+    line_revenue = func.sum(OrderItem.quantity * OrderItem.unit_price_cents)
+
+    bucket_start = _hour_bucket(dialect_name, Order.created_at)
+    db.execute(SalesHourly.__table__.insert().from_select(
+        ["bucket_start", "day", "order_count", "items_sold", "revenue_cents"],
+        select(
+            bucket_start,
+            _day(dialect_name, bucket_start),
+            func.count(distinct(Order.id)),
+            func.sum(OrderItem.quantity),
+            line_revenue,
+        )
+        .join(OrderItem, OrderItem.order_id == Order.id)
+        .where(live)
+        .group_by(bucket_start)
+    ))
+
+    day = _day(dialect_name, Order.created_at)
+    db.execute(ItemSalesDaily.__table__.insert().from_select(
+        ["day", "menu_item_id", "name", "category", "quantity", "revenue_cents"],
+        select(
+            day,
+            OrderItem.menu_item_id,
+            func.coalesce(MenuItem.name, "Item " + cast(OrderItem.menu_item_id, String)),
+            func.coalesce(MenuItem.category, "General"),
+            func.sum(OrderItem.quantity),
+            line_revenue,
+        )
+        .select_from(Order)
+        .join(OrderItem, OrderItem.order_id == Order.id)
+        .outerjoin(MenuItem, MenuItem.id == OrderItem.menu_item_id)
+        .where(live)
+        .group_by(day, OrderItem.menu_item_id, MenuItem.name, MenuItem.category)
+    ))
+
+    processed = db.scalar(select(func.count()).select_from(Order).where(live))
+
+    # Archived orders are no longer in `orders` but still count
+    from .archive import iter_archived_orders
+
+    menu_items = {menu_item.id: menu_item for menu_item in db.scalars(select(MenuItem))}
+    batch = []
+    for order in iter_archived_orders(db):
+        if order.status == ORDER_STATUS_CANCELLED:
+            continue
+        batch.append(order)
+        if len(batch) >= ARCHIVE_BATCH_SIZE:
+            for stmt in rollup_upserts(dialect_name, batch, menu_items):
+                db.execute(stmt)
+            processed += len(batch)
+            batch = []
+    for stmt in rollup_upserts(dialect_name, batch, menu_items):
+        db.execute(stmt)
+    processed += len(batch)
+
+    db.commit()
+    return processed
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from .migrations import verify_schema
+    from .stores import store_engine
+
+    parser = argparse.ArgumentParser(prog="python -m app.rollups", description="Rebuild the sales rollups")
+    parser.add_argument("--store", help="a store's database instead of the main one")
+    args = parser.parse_args()
+
+    engine = store_engine(args.store)
+    verify_schema(engine)
+    db = Session(engine, autoflush=False)
+    try:
+        count = rebuild_rollups(db)
+    finally:
+        db.close()
+        engine.dispose()
+    print(f"✅ Rebuilt sales rollups from {count} orders")
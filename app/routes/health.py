@@ -0,0 +1,53 @@
+# app/routes/health.py
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.dependencies import get_async_db
+
+# Liveness / readiness probes for load balancers and orchestrators.
+# Kept apart from "/" so they can change without breaking clients.
+router = APIRouter(
+    prefix="/health",
+    tags=["Health"]
+)
+
+# Set once the worker starts shutting down: it keeps serving in-flight
+# requests but tells the load balancer to stop sending new ones
+_draining = False
+
+
+def start_draining() -> None:
+    global _draining
+    _draining = True
+
+
+# ======================================================
+# LIVENESS
+# - The process is up and its event loop answers
+# ======================================================
+@router.get("/live")
+async def live():
+    return {"status": "ok"}
+
+
+# ======================================================
+# READINESS
+# - 503 while draining or when the database can't be reached
+# ======================================================
+@router.get("/ready")
+async def ready(db: AsyncSession = Depends(get_async_db)):
+    if _draining:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Shutting down"
+        )
+    try:
+        await db.execute(text("SELECT 1"))
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Database unavailable"
+        )
+    return {"status": "ready"}
@@ -1,13 +1,25 @@
 # app/routes/menu.py
 
-from typing import List
+import csv
+import io
+import json
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import bindparam, case, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models import MenuItem
-from app.schemas import MenuItemResponse, MenuItemCreate, MenuItemUpdate
-from app.dependencies import get_db, require_role
+from app.schemas import MenuItemResponse, MenuListItem, MenuItemCreate, MenuItemUpdate, MenuBulkResult, MenuRestock
+from app.dependencies import get_async_db, require_role
+from app.menu_cache import current_menu_cache, etag_matches
+from app.money import to_cents
+from app.search import fts_available, menu_search_clause
+from app.serialization import orm_response
+from app.stock import stock_availability
+from app.stores import current_store, session_for
 
 router = APIRouter(
     prefix="/menu",
@@ -16,17 +28,100 @@ router = APIRouter(
 
 
 # ======================================================
-# LIST MENU ITEMS (PUBLIC)
+# LIST / SEARCH MENU ITEMS (PUBLIC)
+# - Unfiltered: served from the versioned menu cache,
+#   honors If-None-Match with 304 Not Modified
+# - Filtered: category / availability / price range use
+#   ix_menu_items_category_is_available, q uses full-text search
+# - Without stock counts (they change with every order);
+#   GET /menu/{id} has them
 # ======================================================
 @router.get(
     "/",
-    response_model=List[MenuItemResponse]
+    response_model=List[MenuListItem]
 )
-def list_menu_items(db: Session = Depends(get_db)):
-    return (
-        db.query(MenuItem)
-        .order_by(MenuItem.created_at.desc())
-        .all()
+async def list_menu_items(
+    request: Request,
+    category: Optional[str] = None,
+    available: Optional[bool] = None,
+    q: Optional[str] = Query(None, max_length=100),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if any(value is not None for value in (category, available, q, min_price, max_price)):
+        query = select(MenuItem)
+        if category is not None:
+            query = query.where(MenuItem.category == category)
+        if available is not None:
+            query = query.where(MenuItem.is_available == available)
+        if min_price is not None:
+            query = query.where(MenuItem.price_cents >= to_cents(min_price))
+        if max_price is not None:
+            query = query.where(MenuItem.price_cents <= to_cents(max_price))
+        if q and q.strip():
+            query = query.where(menu_search_clause(MenuItem, q, await fts_available(db)))
+
+        result = await db.execute(query.order_by(MenuItem.created_at.desc()))
+        return orm_response(List[MenuListItem], result.scalars().all())
+
+    async def load_menu():
+        result = await db.execute(
+            select(MenuItem).order_by(MenuItem.created_at.desc())
+        )
+        return result.scalars().all()
+
+    body, etag = await current_menu_cache().get(load_menu)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+# ======================================================
+# EXPORT MENU (ADMIN ONLY)
+# - Streams rows as they are read (CSV or NDJSON)
+# ======================================================
+EXPORT_FIELDS = ["id", "name", "description", "price", "category", "is_available", "stock"]
+
+
+def _csv_line(values) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue()
+
+
+@router.get(
+    "/export",
+    dependencies=[Depends(require_role("admin"))]
+)
+async def export_menu(format: str = Query("csv", pattern="^(csv|ndjson)$")):
+    store = current_store.get()
+
+    async def rows():
+        # Own session: it must stay open for as long as the body streams
+        async with session_for(store) as db:
+            result = await db.stream_scalars(
+                select(MenuItem)
+                .order_by(MenuItem.id)
+                .execution_options(yield_per=500)
+            )
+            if format == "csv":
+                yield _csv_line(EXPORT_FIELDS)
+            async for item in result:
+                values = [getattr(item, field) for field in EXPORT_FIELDS]
+                if format == "csv":
+                    yield _csv_line(values)
+                else:
+                    yield json.dumps(dict(zip(EXPORT_FIELDS, values))) + "\n"
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        rows(),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=menu.{format}"}
     )
 
 
@@ -37,8 +132,8 @@ def list_menu_items(db: Session = Depends(get_db)):
     "/{item_id}",
     response_model=MenuItemResponse
 )
-def get_menu_item(item_id: int, db: Session = Depends(get_db)):
-    menu_item = db.query(MenuItem).filter(MenuItem.id == item_id).first()
+async def get_menu_item(item_id: int, db: AsyncSession = Depends(get_async_db)):
+    menu_item = await db.get(MenuItem, item_id)
     if not menu_item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -50,26 +145,184 @@ def get_menu_item(item_id: int, db: Session = Depends(get_db)):
 # ======================================================
 # CREATE MENU ITEM (ADMIN ONLY)
 # ======================================================
+def _new_menu_item(item: MenuItemCreate) -> MenuItem:
+    # Schema defaults for unset fields; an initial stock of 0 starts unavailable
+    return MenuItem(**{**item.model_dump(), **stock_availability(item.model_dump(exclude_unset=True), None)})
+
+
 @router.post(
     "/",
     response_model=MenuItemResponse,
     status_code=status.HTTP_201_CREATED,
     dependencies=[Depends(require_role("admin"))]
 )
-def create_menu_item(item: MenuItemCreate, db: Session = Depends(get_db)):
-    existing_item = db.query(MenuItem).filter(MenuItem.name == item.name).first()
+async def create_menu_item(item: MenuItemCreate, db: AsyncSession = Depends(get_async_db)):
+    existing_item = await db.scalar(select(MenuItem).where(MenuItem.name == item.name))
     if existing_item:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Menu item with this name already exists"
         )
-    db_item = MenuItem(**item.dict())
+    db_item = _new_menu_item(item)
     db.add(db_item)
-    db.commit()
-    db.refresh(db_item)
+    await db.commit()
+    current_menu_cache().bump()
+    await db.refresh(db_item)
     return db_item
 
 
+# ======================================================
+# BULK IMPORT / UPSERT MENU ITEMS (ADMIN ONLY)
+# - Body is CSV (text/csv) or NDJSON (application/x-ndjson)
+# - Rows are matched to existing items by name
+# - All rows are validated first, then applied in one transaction
+# - stock keeps is_available in step, as PUT /menu/{id} does
+# ======================================================
+MENU_BULK_MAX_ROWS = 5000
+
+
+def _parse_bulk_rows(body: bytes, content_type: str) -> List[dict]:
+    try:
+        text = body.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Body must be UTF-8"
+        )
+
+    if content_type in ("text/csv", "application/csv"):
+        rows = list(csv.DictReader(io.StringIO(text)))
+        # Empty cells fall back to the schema defaults
+        return [{k: v for k, v in row.items() if k and v not in (None, "")} for row in rows]
+
+    if content_type in ("application/x-ndjson", "application/jsonl", "application/json-lines"):
+        rows = []
+        for line_no, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except json.JSONDecodeError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Line {line_no}: invalid JSON"
+                )
+        return rows
+
+    raise HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail="Use text/csv or application/x-ndjson"
+    )
+
+
+@router.post(
+    "/bulk",
+    response_model=MenuBulkResult,
+    dependencies=[Depends(require_role("admin"))]
+)
+async def bulk_upsert_menu_items(request: Request, db: AsyncSession = Depends(get_async_db)):
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    rows = _parse_bulk_rows(await request.body(), content_type)
+
+    if not rows:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No rows to import"
+        )
+    if len(rows) > MENU_BULK_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {MENU_BULK_MAX_ROWS} rows per import"
+        )
+
+    # Validate every row before touching the database
+    items: dict = {}
+    errors = []
+    for row_no, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            errors.append({"row": row_no, "error": "Row must be an object"})
+            continue
+        row.pop("id", None)
+        try:
+            item = MenuItemCreate(**row)
+        except ValidationError as exc:
+            errors.append({"row": row_no, "error": exc.errors(include_url=False, include_context=False)})
+            continue
+        if item.name in items:
+            errors.append({"row": row_no, "error": f"Duplicate name '{item.name}'"})
+            continue
+        items[item.name] = item
+
+    if errors:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=errors
+        )
+
+    # Resolve name conflicts in one query
+    result = await db.scalars(select(MenuItem).where(MenuItem.name.in_(items.keys())))
+    existing = {menu_item.name: menu_item for menu_item in result}
+
+    created = 0
+    for name, item in items.items():
+        db_item = existing.get(name)
+        if db_item:
+            # Only overwrite the columns the row actually provided
+            for field, value in stock_availability(item.model_dump(exclude_unset=True), db_item.stock).items():
+                setattr(db_item, field, value)
+        else:
+            db.add(_new_menu_item(item))
+            created += 1
+
+    await db.commit()
+    current_menu_cache().bump()
+
+    return {"created": created, "updated": len(items) - created}
+
+
+# ======================================================
+# BULK RESTOCK (ADMIN ONLY)
+# - Adds each quantity to the item's stock in one executemany
+#   UPDATE (starts tracking items that weren't)
+# - Items that had sold out (stock 0) become available again
+# ======================================================
+@router.post(
+    "/restock",
+    response_model=List[MenuItemResponse],
+    dependencies=[Depends(require_role("admin"))]
+)
+async def restock_menu_items(restock: MenuRestock, db: AsyncSession = Depends(get_async_db)):
+    quantities: dict = {}
+    for item in restock.items:
+        quantities[item.menu_item_id] = quantities.get(item.menu_item_id, 0) + item.quantity
+
+    result = await db.scalars(select(MenuItem.id).where(MenuItem.id.in_(quantities)))
+    missing = sorted(set(quantities) - set(result))
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Menu items not found: {', '.join(map(str, missing))}"
+        )
+
+    table = MenuItem.__table__
+    await db.execute(
+        update(table)
+        .where(table.c.id == bindparam("item_id"))
+        .values(
+            stock=func.coalesce(table.c.stock, 0) + bindparam("quantity"),
+            is_available=case((table.c.stock == 0, True), else_=table.c.is_available)
+        ),
+        [{"item_id": menu_item_id, "quantity": quantity} for menu_item_id, quantity in quantities.items()]
+    )
+    await db.commit()
+    current_menu_cache().bump()
+
+    result = await db.scalars(
+        select(MenuItem).where(MenuItem.id.in_(quantities)).order_by(MenuItem.id)
+    )
+    return orm_response(List[MenuItemResponse], result.all())
+
+
 # ======================================================
 # UPDATE MENU ITEM (ADMIN ONLY)
 # ======================================================
@@ -78,18 +331,19 @@ def create_menu_item(item: MenuItemCreate, db: Session = Depends(get_db)):
     response_model=MenuItemResponse,
     dependencies=[Depends(require_role("admin"))]
 )
-def update_menu_item(item_id: int, item: MenuItemUpdate, db: Session = Depends(get_db)):
-    db_item = db.query(MenuItem).filter(MenuItem.id == item_id).first()
+async def update_menu_item(item_id: int, item: MenuItemUpdate, db: AsyncSession = Depends(get_async_db)):
+    db_item = await db.get(MenuItem, item_id)
     if not db_item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Menu item not found"
         )
-    update_data = item.dict(exclude_unset=True)
+    update_data = stock_availability(item.model_dump(exclude_unset=True), db_item.stock)
     for field, value in update_data.items():
         setattr(db_item, field, value)
-    db.commit()
-    db.refresh(db_item)
+    await db.commit()
+    current_menu_cache().bump()
+    await db.refresh(db_item)
     return db_item
 
 
@@ -101,13 +355,14 @@ def update_menu_item(item_id: int, item: MenuItemUpdate, db: Session = Depends(g
     status_code=status.HTTP_200_OK,
     dependencies=[Depends(require_role("admin"))]
 )
-def delete_menu_item(item_id: int, db: Session = Depends(get_db)):
-    db_item = db.query(MenuItem).filter(MenuItem.id == item_id).first()
+async def delete_menu_item(item_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_item = await db.get(MenuItem, item_id)
     if not db_item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Menu item not found"
         )
-    db.delete(db_item)
-    db.commit()
+    await db.delete(db_item)
+    await db.commit()
+    current_menu_cache().bump()
     return {"detail": "Menu item deleted successfully"}
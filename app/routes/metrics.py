@@ -0,0 +1,59 @@
+# app/routes/metrics.py
+
+from typing import List
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from app.metrics import profiler, render_prometheus
+from app.schemas import ProfileReport, ProfilingSettings
+from app.dependencies import require_role
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["Metrics"]
+)
+
+
+# ======================================================
+# PROMETHEUS SCRAPE ENDPOINT (PUBLIC)
+# ======================================================
+@router.get("", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(
+        render_prometheus(),
+        media_type="text/plain; version=0.0.4"
+    )
+
+
+# ======================================================
+# SAMPLING PROFILER (ADMIN ONLY)
+# - Toggle at runtime, no redeploy needed
+# ======================================================
+@router.get(
+    "/profiling",
+    response_model=ProfilingSettings,
+    dependencies=[Depends(require_role("admin"))]
+)
+async def get_profiling():
+    return {"sample_rate": profiler.sample_rate}
+
+
+@router.put(
+    "/profiling",
+    response_model=ProfilingSettings,
+    dependencies=[Depends(require_role("admin"))]
+)
+async def set_profiling(settings: ProfilingSettings):
+    profiler.sample_rate = settings.sample_rate
+    return {"sample_rate": profiler.sample_rate}
+
+
+@router.get(
+    "/profiles",
+    response_model=List[ProfileReport],
+    dependencies=[Depends(require_role("admin"))]
+)
+async def list_profiles():
+    # Most recent first
+    return list(reversed(profiler.reports))
@@ -1,13 +1,44 @@
 # app/routes/orders.py
 
+import asyncio
+import base64
+import binascii
+import csv
+import io
+import json
+import uuid
+from datetime import datetime
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from app.models import Order, OrderItem, MenuItem, User
-from app.schemas import OrderCreate, OrderResponse
-from app.dependencies import get_db, get_current_user, get_optional_user
+from app import config
+from app.models import Order, OrderItem, MenuItem, User, ORDER_TRANSITIONS, ORDER_STATUS_CANCELLED
+from app.schemas import OrderCreate, OrderResponse, OrderStatusUpdate, OrderTicket
+from app.dependencies import (
+    get_async_db,
+    get_current_user,
+    get_optional_user,
+    get_stream_user,
+    get_users_db,
+    require_any_role,
+    require_role,
+)
+from app.archive import find_archived_orders, stream_archived_orders
+from app.events import order_broker_for, record_events
+from app.idempotency import request_fingerprint, stored_response, store_response
+from app.menu_cache import menu_cache_for
+from app.money import from_cents
+from app.order_queue import OrderQueueFull, QueuedOrder, order_writer
+from app.rollups import rollup_upserts
+from app.serialization import orm_response
+from app.stock import OutOfStock, requested_stock, short_item, take_stock
+from app.stores import current_store, session_for
 
 router = APIRouter(
     prefix="/orders",
@@ -19,15 +50,24 @@ router = APIRouter(
 # CREATE ORDER
 # - Public (guest allowed)
 # - Logged-in users allowed
+# - Optional Idempotency-Key header: a retry with the same key
+#   gets the stored response instead of creating a second order
+# - ORDER_WRITE_BEHIND: validated against the cached menu, queued
+#   for the group-commit writer and answered with 202 + a ticket
+# - Tracked stock is taken with conditional decrements (app/stock.py);
+#   409 if an item runs out
 # ======================================================
 @router.post(
     "/",
     response_model=OrderResponse,
-    status_code=status.HTTP_201_CREATED
+    status_code=status.HTTP_201_CREATED,
+    responses={202: {"model": OrderTicket, "description": "Accepted for write-behind"}}
 )
-def create_order(
+async def create_order(
     order: OrderCreate,
-    db: Session = Depends(get_db),
+    request: Request,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Optional[User] = Depends(get_optional_user)
 ):
     if not order.items:
@@ -36,16 +76,36 @@ def create_order(
             detail="Order must contain at least one item"
         )
 
-    # Create order (user_id=None for guests)
-    db_order = Order(
-        user_id=current_user.id if current_user else None,
-        total_amount=0.0
-    )
-    db.add(db_order)
-    db.commit()
-    db.refresh(db_order)
+    store = current_store.get()
+
+    if idempotency_key:
+        fingerprint = request_fingerprint(current_user.id if current_user else None, order)
+        replay = config.ORDER_WRITE_BEHIND and order_writer.replay(store, idempotency_key, fingerprint)
+        if not replay:
+            replay = await stored_response(db, idempotency_key, fingerprint)
+        if replay:
+            return replay
+
+    if config.ORDER_WRITE_BEHIND:
+        async def load_available():
+            result = await db.execute(select(MenuItem).where(MenuItem.is_available == True))
+            return result.scalars().all()
+
+        menu_items = await menu_cache_for(store).items(load_available)
+    else:
+        # Resolve every requested menu item in one query (repeated ids deduped)
+        requested_ids = {item.menu_item_id for item in order.items}
+        result = await db.execute(
+            select(MenuItem).where(
+                MenuItem.id.in_(requested_ids),
+                MenuItem.is_available == True
+            )
+        )
+        menu_items = {menu_item.id: menu_item for menu_item in result.scalars()}
 
-    total_amount = 0.0
+    # Validate all lines before writing anything (integer cents: exact)
+    total_cents = 0
+    lines = []
 
     for item in order.items:
         if item.quantity <= 0:
@@ -54,10 +114,7 @@ def create_order(
                 detail="Item quantity must be greater than zero"
             )
 
-        menu_item = db.query(MenuItem).filter(
-            MenuItem.id == item.menu_item_id,
-            MenuItem.is_available == True
-        ).first()
+        menu_item = menu_items.get(item.menu_item_id)
 
         if not menu_item:
             raise HTTPException(
@@ -65,42 +122,504 @@ def create_order(
                 detail=f"Menu item {item.menu_item_id} not available"
             )
 
-        line_total = menu_item.price * item.quantity
-        total_amount += line_total
+        total_cents += menu_item.price_cents * item.quantity
+        lines.append((menu_item.id, item.quantity, menu_item.price_cents))
+
+    wanted = requested_stock(lines, menu_items)
+    short = short_item(wanted, menu_items)
+    if short is not None:
+        raise _out_of_stock(short)
+
+    if config.ORDER_WRITE_BEHIND:
+        return _enqueue_order(
+            request,
+            current_user,
+            total_cents,
+            lines,
+            menu_items,
+            wanted,
+            store,
+            (idempotency_key, fingerprint) if idempotency_key else None
+        )
+
+    # Take stock first: the conditional UPDATEs are the real check
+    try:
+        sold_out = await take_stock(db, wanted)
+    except OutOfStock as exc:
+        await db.rollback()
+        raise _out_of_stock(exc.menu_item_id)
+
+    order_items = [
+        OrderItem(menu_item_id=menu_item_id, quantity=quantity, unit_price_cents=unit_price_cents)
+        for menu_item_id, quantity, unit_price_cents in lines
+    ]
+
+    # Create order with its items in a single transaction (user_id=None for guests)
+    db_order = Order(
+        user_id=current_user.id if current_user else None,
+        total_amount_cents=total_cents,
+        created_at=datetime.utcnow(),
+        items=order_items
+    )
+    db.add(db_order)
+
+    # Sales rollups commit together with the order
+    for stmt in rollup_upserts(db.bind.dialect.name, [db_order], menu_items):
+        await db.execute(stmt)
+
+    # Assign the order id so the response can be stored with the key
+    await db.flush()
+    order_data = OrderResponse.model_validate(db_order, from_attributes=True)
+    body = order_data.model_dump_json()
+
+    if idempotency_key:
+        await store_response(db, idempotency_key, fingerprint, status.HTTP_201_CREATED, body)
+    await record_events(db, [("order.created", body)])
+
+    try:
+        await db.commit()
+    except IntegrityError:
+        # A concurrent retry with the same key committed first
+        await db.rollback()
+        replay = await stored_response(db, idempotency_key, fingerprint) if idempotency_key else None
+        if replay:
+            return replay
+        raise
+
+    if sold_out:
+        menu_cache_for(store).bump()
+    order_broker_for(store).wake()
+
+    # Already validated above; send the encoded body as-is
+    return Response(content=body, status_code=status.HTTP_201_CREATED, media_type="application/json")
+
+
+def _out_of_stock(menu_item_id: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Menu item {menu_item_id} is out of stock"
+    )
+
+
+def _enqueue_order(request, current_user, total_cents, lines, menu_items, stock, store, idempotency):
+    ticket = str(uuid.uuid4())
+    accepted = OrderTicket(
+        ticket=ticket,
+        status="queued",
+        status_url=str(request.url_for("order_ticket_status", ticket=ticket)),
+        total_amount=from_cents(total_cents)
+    )
+    body = accepted.model_dump_json()
+
+    try:
+        order_writer.submit(QueuedOrder(
+            ticket=ticket,
+            user_id=current_user.id if current_user else None,
+            total_cents=total_cents,
+            lines=lines,
+            menu_items={menu_item_id: menu_items[menu_item_id] for menu_item_id, _, _ in lines},
+            stock=stock,
+            store=store,
+            idempotency=(*idempotency, body) if idempotency else None
+        ))
+    except OrderQueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many orders waiting to be written, try again shortly",
+            headers={"Retry-After": "1"}
+        )
+
+    return Response(
+        content=body,
+        status_code=status.HTTP_202_ACCEPTED,
+        media_type="application/json",
+        headers={"Location": accepted.status_url}
+    )
+
+
+# ======================================================
+# ORDER TICKET STATUS
+# - Public: tickets are unguessable and only issued to the client
+#   that placed the order
+# - 202 while queued, 200 once created (with the order) or failed
+# ======================================================
+@router.get(
+    "/tickets/{ticket}",
+    response_model=OrderTicket,
+    name="order_ticket_status"
+)
+async def order_ticket_status(
+    ticket: str,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
+):
+    status_url = str(request.url)
+    queued, error = order_writer.lookup(current_store.get(), ticket)
+
+    if queued is not None and not error:
+        result = OrderTicket(
+            ticket=ticket,
+            status="queued",
+            status_url=status_url,
+            total_amount=from_cents(queued.total_cents)
+        )
+        return Response(
+            content=result.model_dump_json(),
+            status_code=status.HTTP_202_ACCEPTED,
+            media_type="application/json"
+        )
 
-        db_order_item = OrderItem(
-            order_id=db_order.id,
-            menu_item_id=menu_item.id,
-            quantity=item.quantity,
-            unit_price=menu_item.price
+    # Checked for failed tickets too: an order taken by a writer task
+    # that died is failed, but may have committed
+    result = await db.execute(
+        select(Order).options(selectinload(Order.items)).where(Order.ticket == ticket)
+    )
+    db_order = result.scalar_one_or_none()
+    if not db_order and error:
+        return OrderTicket(
+            ticket=ticket,
+            status="failed",
+            status_url=status_url,
+            total_amount=from_cents(queued.total_cents),
+            detail=error
         )
-        db.add(db_order_item)
+    if not db_order:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Ticket not found"
+        )
+
+    order_data = OrderResponse.model_validate(db_order, from_attributes=True)
+    return OrderTicket(
+        ticket=ticket,
+        status="created",
+        status_url=status_url,
+        total_amount=order_data.total_amount,
+        order=order_data
+    )
+
+
+# ======================================================
+# KEYSET CURSORS
+# Opaque token encoding the (created_at, id) of the last row served
+# ======================================================
+def _encode_cursor(order: Order) -> str:
+    raw = f"{order.created_at.isoformat()}|{order.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
 
-    # Update order total
-    db_order.total_amount = total_amount
-    db.commit()
-    db.refresh(db_order)
 
-    return db_order
+def _decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, order_id = raw.split("|")
+        return datetime.fromisoformat(created_at), int(order_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
 
 
 # ======================================================
 # LIST ORDERS
 # - Authentication required
-# - Admin: all orders
+# - Admin: all orders (optionally filtered by user_id)
 # - User: only own orders
+# - Keyset pagination on (created_at, id), newest first;
+#   the next page cursor is returned in the X-Next-Cursor header
 # ======================================================
 @router.get(
     "/",
     response_model=List[OrderResponse]
 )
-def list_orders(
-    db: Session = Depends(get_db),
+async def list_orders(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    created_from: Optional[datetime] = Query(None, alias="from"),
+    created_to: Optional[datetime] = Query(None, alias="to"),
+    user_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
+    query = select(Order).options(selectinload(Order.items))
+
     if current_user.role == "admin":
-        return db.query(Order).order_by(Order.created_at.desc()).all()
+        if user_id is not None:
+            query = query.where(Order.user_id == user_id)
+    else:
+        query = query.where(Order.user_id == current_user.id)
+
+    if status_filter:
+        query = query.where(Order.status == status_filter)
+    if created_from:
+        query = query.where(Order.created_at >= created_from)
+    if created_to:
+        query = query.where(Order.created_at < created_to)
+
+    if cursor:
+        cursor_created_at, cursor_id = _decode_cursor(cursor)
+        query = query.where(or_(
+            Order.created_at < cursor_created_at,
+            and_(Order.created_at == cursor_created_at, Order.id < cursor_id)
+        ))
+
+    # Fetch one extra row to know whether another page exists
+    result = await db.execute(
+        query.order_by(Order.created_at.desc(), Order.id.desc())
+        .limit(limit + 1)
+    )
+    orders = result.scalars().all()
 
-    return db.query(Order).filter(Order.user_id == current_user.id).order_by(
-        Order.created_at.desc()
-    ).all()
+    # Hot rows ran out: continue into archived history (app/archive.py)
+    if len(orders) <= limit:
+        archived = await find_archived_orders(
+            db,
+            limit + 1,
+            user_id=user_id if current_user.role == "admin" else current_user.id,
+            status=status_filter,
+            created_from=created_from,
+            created_to=created_to,
+            before=(cursor_created_at, cursor_id) if cursor else None
+        )
+        if archived:
+            orders = sorted(
+                [*orders, *archived], key=lambda order: (order.created_at, order.id), reverse=True
+            )[:limit + 1]
+
+    headers = {}
+    if len(orders) > limit:
+        orders = orders[:limit]
+        headers["X-Next-Cursor"] = _encode_cursor(orders[-1])
+
+    return orm_response(List[OrderResponse], orders, headers=headers)
+
+
+# ======================================================
+# EXPORT ORDERS (ADMIN ONLY, ACCOUNTING)
+# - One row per order line, CSV or NDJSON, streamed as it is read:
+#   a single orders/order_items/menu_items join fetched through a
+#   server-side cursor, so memory stays flat whatever the range
+# - Archived orders in the range come first, segment by segment
+# ======================================================
+EXPORT_COLUMNS = [
+    "order_id", "created_at", "status", "user_id", "order_total",
+    "menu_item_id", "item_name", "category", "quantity", "unit_price", "line_total",
+]
+# Rows fetched and encoded per chunk
+EXPORT_BATCH_ROWS = 1000
+
+
+def _export_row(order_id, created_at, order_status, user_id, total_cents,
+                menu_item_id, name, category, quantity, unit_price_cents) -> list:
+    return [
+        order_id, created_at.isoformat(), order_status, user_id, from_cents(total_cents),
+        menu_item_id, name, category, quantity, from_cents(unit_price_cents),
+        from_cents(unit_price_cents * quantity),
+    ]
+
+
+def _encode_rows(rows: List[list], format: str) -> str:
+    if format == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue()
+    return "".join(json.dumps(dict(zip(EXPORT_COLUMNS, row))) + "\n" for row in rows)
+
+
+@router.get(
+    "/export",
+    dependencies=[Depends(require_role("admin"))]
+)
+async def export_orders(
+    created_from: Optional[datetime] = Query(None, alias="from"),
+    created_to: Optional[datetime] = Query(None, alias="to"),
+    format: str = Query("csv", pattern="^(csv|ndjson)$")
+):
+    store = current_store.get()
+
+    async def rows():
+        # Own session: it must stay open for as long as the body streams
+        async with session_for(store) as db:
+            if format == "csv":
+                yield _encode_rows([EXPORT_COLUMNS], format)
+
+            # Archived lines only carry the menu item id
+            result = await db.execute(select(MenuItem.id, MenuItem.name, MenuItem.category))
+            menu_names = {menu_item_id: (name, category) for menu_item_id, name, category in result}
+            async for records in stream_archived_orders(db, created_from, created_to):
+                lines = [
+                    _export_row(
+                        record["id"], record["created_at"], record["status"], record["user_id"],
+                        record["total_amount_cents"], item["menu_item_id"],
+                        *menu_names.get(item["menu_item_id"], (None, None)),
+                        item["quantity"], item["unit_price_cents"]
+                    )
+                    for record in records
+                    for item in record["items"]
+                ]
+                for start in range(0, len(lines), EXPORT_BATCH_ROWS):
+                    yield _encode_rows(lines[start:start + EXPORT_BATCH_ROWS], format)
+
+            query = (
+                select(
+                    Order.id, Order.created_at, Order.status, Order.user_id, Order.total_amount_cents,
+                    OrderItem.menu_item_id, MenuItem.name, MenuItem.category,
+                    OrderItem.quantity, OrderItem.unit_price_cents,
+                )
+                .join(OrderItem, OrderItem.order_id == Order.id)
+                .outerjoin(MenuItem, MenuItem.id == OrderItem.menu_item_id)
+            )
+            if created_from:
+                query = query.where(Order.created_at >= created_from)
+            if created_to:
+                query = query.where(Order.created_at < created_to)
+
+            result = await db.stream(
+                query.order_by(Order.created_at, Order.id, OrderItem.id)
+                .execution_options(yield_per=EXPORT_BATCH_ROWS)
+            )
+            async for partition in result.partitions():
+                yield _encode_rows([_export_row(*row) for row in partition], format)
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        rows(),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=orders.{format}"}
+    )
+
+
+# ======================================================
+# KITCHEN QUEUE
+# - Staff / admin only
+# - Oldest first; served by ix_orders_status_created_at, so the
+#   cost doesn't grow with the number of closed orders
+# ======================================================
+@router.get(
+    "/queue",
+    response_model=List[OrderResponse],
+    dependencies=[Depends(require_any_role("admin", "staff"))]
+)
+async def order_queue(
+    status_filter: str = Query("pending", alias="status"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db)
+):
+    result = await db.execute(
+        select(Order)
+        .options(selectinload(Order.items))
+        .where(Order.status == status_filter)
+        .order_by(Order.created_at, Order.id)
+        .limit(limit)
+    )
+    return orm_response(List[OrderResponse], result.scalars().all())
+
+
+# ======================================================
+# UPDATE ORDER STATUS
+# - Staff / admin only
+# - Only transitions in ORDER_TRANSITIONS are allowed
+# - Optimistic concurrency: the client sends the version it saw;
+#   a conditional UPDATE makes sure only one change wins (409 otherwise)
+# ======================================================
+@router.patch(
+    "/{order_id}/status",
+    response_model=OrderResponse,
+    dependencies=[Depends(require_any_role("admin", "staff"))]
+)
+async def update_order_status(
+    order_id: int,
+    change: OrderStatusUpdate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    db_order = await db.get(Order, order_id, options=[selectinload(Order.items)])
+    if not db_order:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Order not found"
+        )
+
+    if change.status not in ORDER_TRANSITIONS.get(db_order.status, set()):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Cannot change order from '{db_order.status}' to '{change.status}'"
+        )
+
+    result = await db.execute(
+        update(Order)
+        .where(
+            Order.id == order_id,
+            Order.version == change.version,
+            Order.status == db_order.status
+        )
+        .values(status=change.status, version=Order.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Order was changed by someone else, reload and retry"
+        )
+
+    # Cancelled orders no longer count as sales
+    if change.status == ORDER_STATUS_CANCELLED:
+        for stmt in rollup_upserts(db.bind.dialect.name, [db_order], {}, sign=-1):
+            await db.execute(stmt)
+
+    await db.refresh(db_order, ["status", "version"])
+    body = OrderResponse.model_validate(db_order, from_attributes=True).model_dump_json()
+    await record_events(db, [("order.status", body)])
+
+    await db.commit()
+    order_broker_for(current_store.get()).wake()
+
+    return Response(content=body, media_type="application/json")
+
+
+# ======================================================
+# ORDER STREAM (KITCHEN DISPLAYS)
+# - Authentication required (header or ?access_token=)
+# - Server-Sent Events: order.created / order.status
+# - Reconnects resume from Last-Event-ID
+# ======================================================
+SSE_KEEPALIVE_SECONDS = 15
+
+
+@router.get("/stream")
+async def stream_orders(
+    request: Request,
+    last_event_id: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_users_db),
+    current_user: User = Depends(get_stream_user)
+):
+    # Auth is done; don't pin a pooled connection for the stream's lifetime
+    await db.close()
+
+    resume_from = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+    broker = order_broker_for(current_store.get())
+
+    async def events():
+        queue = await broker.subscribe(resume_from)
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    frame = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                if frame is None:
+                    break
+                yield frame
+        finally:
+            broker.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
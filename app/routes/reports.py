@@ -0,0 +1,199 @@
+# app/routes/reports.py
+
+import asyncio
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import config
+from app.models import ItemSalesDaily, SalesHourly
+from app.schemas import (
+    CategorySales,
+    CrossStoreSales,
+    DailyRevenue,
+    ItemSales,
+    RevenueBucket,
+    SalesSummary,
+)
+from app.dependencies import get_async_db, require_role
+from app.money import from_cents
+from app.stores import session_for
+
+# All reports read the rollup tables maintained by create_order,
+# never the orders / order_items tables themselves.
+router = APIRouter(
+    prefix="/reports",
+    tags=["Reports"],
+    dependencies=[Depends(require_role("admin"))]
+)
+
+
+def _day_range(query, column, day_from: Optional[date], day_to: Optional[date]):
+    """
+    Inclusive [from, to] filter on a Date column.
+    """
+    if day_from:
+        query = query.where(column >= day_from)
+    if day_to:
+        query = query.where(column <= day_to)
+    return query
+
+
+def _row(row) -> dict:
+    """
+    Result row as a dict, with the summed revenue_cents as a decimal amount.
+    """
+    data = dict(row._mapping)
+    data["revenue"] = from_cents(data.pop("revenue_cents") or 0)
+    return data
+
+
+# ======================================================
+# REVENUE PER DAY
+# ======================================================
+@router.get("/revenue/daily", response_model=List[DailyRevenue])
+async def revenue_daily(
+    day_from: Optional[date] = Query(None, alias="from"),
+    day_to: Optional[date] = Query(None, alias="to"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    query = select(
+        SalesHourly.day.label("day"),
+        func.sum(SalesHourly.order_count).label("order_count"),
+        func.sum(SalesHourly.items_sold).label("items_sold"),
+        func.sum(SalesHourly.revenue_cents).label("revenue_cents"),
+    ).group_by(SalesHourly.day).order_by(SalesHourly.day)
+
+    result = await db.execute(_day_range(query, SalesHourly.day, day_from, day_to))
+    return [_row(row) for row in result]
+
+
+# ======================================================
+# REVENUE PER HOUR
+# ======================================================
+@router.get("/revenue/hourly", response_model=List[RevenueBucket])
+async def revenue_hourly(
+    day_from: Optional[date] = Query(None, alias="from"),
+    day_to: Optional[date] = Query(None, alias="to"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    query = select(SalesHourly).order_by(SalesHourly.bucket_start)
+    if day_from:
+        query = query.where(SalesHourly.bucket_start >= datetime.combine(day_from, time.min))
+    if day_to:
+        query = query.where(
+            SalesHourly.bucket_start < datetime.combine(day_to + timedelta(days=1), time.min)
+        )
+
+    result = await db.scalars(query)
+    return [
+        {
+            "period": bucket.bucket_start,
+            "order_count": bucket.order_count,
+            "items_sold": bucket.items_sold,
+            "revenue": from_cents(bucket.revenue_cents),
+        }
+        for bucket in result
+    ]
+
+
+# ======================================================
+# TOP ITEMS
+# ======================================================
+@router.get("/top-items", response_model=List[ItemSales])
+async def top_items(
+    day_from: Optional[date] = Query(None, alias="from"),
+    day_to: Optional[date] = Query(None, alias="to"),
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db)
+):
+    quantity = func.sum(ItemSalesDaily.quantity)
+    query = select(
+        ItemSalesDaily.menu_item_id.label("menu_item_id"),
+        func.max(ItemSalesDaily.name).label("name"),
+        quantity.label("quantity"),
+        func.sum(ItemSalesDaily.revenue_cents).label("revenue_cents"),
+    ).group_by(ItemSalesDaily.menu_item_id).having(quantity > 0).order_by(quantity.desc()).limit(limit)
+
+    result = await db.execute(_day_range(query, ItemSalesDaily.day, day_from, day_to))
+    return [_row(row) for row in result]
+
+
+# ======================================================
+# SALES PER CATEGORY
+# ======================================================
+@router.get("/categories", response_model=List[CategorySales])
+async def category_sales(
+    day_from: Optional[date] = Query(None, alias="from"),
+    day_to: Optional[date] = Query(None, alias="to"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    revenue = func.sum(ItemSalesDaily.revenue_cents)
+    query = select(
+        ItemSalesDaily.category.label("category"),
+        func.sum(ItemSalesDaily.quantity).label("quantity"),
+        revenue.label("revenue_cents"),
+    ).group_by(ItemSalesDaily.category).order_by(revenue.desc())
+
+    result = await db.execute(_day_range(query, ItemSalesDaily.day, day_from, day_to))
+    return [_row(row) for row in result]
+
+
+# ======================================================
+# SUMMARY (totals and average ticket)
+# ======================================================
+async def _totals(db: AsyncSession, day_from: Optional[date], day_to: Optional[date]):
+    """
+    (order_count, items_sold, revenue_cents) over the day range.
+    """
+    query = select(
+        func.coalesce(func.sum(SalesHourly.order_count), 0),
+        func.coalesce(func.sum(SalesHourly.items_sold), 0),
+        func.coalesce(func.sum(SalesHourly.revenue_cents), 0),
+    )
+    result = await db.execute(_day_range(query, SalesHourly.day, day_from, day_to))
+    return tuple(result.one())
+
+
+def _summary(order_count: int, items_sold: int, revenue_cents: int) -> dict:
+    return {
+        "order_count": order_count,
+        "items_sold": items_sold,
+        "revenue": from_cents(revenue_cents),
+        "average_ticket": round(from_cents(revenue_cents) / order_count, 2) if order_count else 0.0,
+    }
+
+
+@router.get("/summary", response_model=SalesSummary)
+async def sales_summary(
+    day_from: Optional[date] = Query(None, alias="from"),
+    day_to: Optional[date] = Query(None, alias="to"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return _summary(*await _totals(db, day_from, day_to))
+
+
+# ======================================================
+# ALL STORES (main database + every store in STORES)
+# - Queries each store's database concurrently
+# ======================================================
+@router.get("/stores", response_model=CrossStoreSales)
+async def cross_store_sales(
+    day_from: Optional[date] = Query(None, alias="from"),
+    day_to: Optional[date] = Query(None, alias="to")
+):
+    stores = [None, *config.STORES]
+
+    async def store_totals(store):
+        async with session_for(store) as db:
+            return await _totals(db, day_from, day_to)
+
+    totals = await asyncio.gather(*(store_totals(store) for store in stores))
+
+    return {
+        "stores": [{"store": store, **_summary(*row)} for store, row in zip(stores, totals)],
+        "total": _summary(*(sum(column) for column in zip(*totals))),
+    }
@@ -1,45 +1,76 @@
 # app/routes/users.py
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import OAuth2PasswordRequestForm
 
 from app import models, schemas, auth
-from app.database import SessionLocal
+from app.auth_cache import auth_cache_stats
+from app.dependencies import get_users_db, require_role
+from app.password_pool import password_pool, PasswordPoolBusy
+from app.rate_limit import login_limiter
 
 router = APIRouter(
     prefix="/auth",
     tags=["auth"]
 )
 
-# Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 # -----------------------------
 # Login route (OAuth2 password flow)
 # -----------------------------
 @router.post("/login", response_model=schemas.Token)
-def login(
+async def login(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_users_db)
 ):
+    client_ip = request.client.host if request.client else "unknown"
+
+    # Reject before doing any hashing work if this user/IP failed too often
+    retry_after = login_limiter.blocked(form_data.username, client_ip)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts, try again later",
+            headers={"Retry-After": str(retry_after)},
+        )
+
     # Check if user exists
-    db_user = db.query(models.User).filter(
-        models.User.username == form_data.username
-    ).first()
+    db_user = await db.scalar(
+        select(models.User).where(models.User.username == form_data.username)
+    )
+
+    # Verify password on the dedicated hashing pool
+    valid, new_hash = False, None
+    if db_user:
+        try:
+            valid, new_hash = await password_pool.run(
+                auth.verify_and_update_password,
+                form_data.password,
+                db_user.password_hash
+            )
+        except PasswordPoolBusy:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Login is busy, try again shortly",
+                headers={"Retry-After": "1"},
+            )
 
-    # Verify password
-    if not db_user or not auth.verify_password(form_data.password, db_user.password_hash):
+    if not valid:
+        login_limiter.record_failure(form_data.username, client_ip)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    login_limiter.record_success(form_data.username)
+
+    # Re-hash with the current argon2 parameters
+    if new_hash:
+        db_user.password_hash = new_hash
+        await db.commit()
+
     # Create JWT token
     access_token = auth.create_access_token(
         data={
@@ -52,3 +83,11 @@ def login(
         "access_token": access_token,
         "token_type": "bearer"
     }
+
+
+# -----------------------------
+# Auth cache counters (admin only)
+# -----------------------------
+@router.get("/cache-stats", dependencies=[Depends(require_role("admin"))])
+async def cache_stats():
+    return auth_cache_stats()
@@ -1,8 +1,8 @@
 # app/schemas.py
 
-from pydantic import BaseModel, Field
-from typing import List, Optional
-from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Literal, Optional
+from datetime import date, datetime
 
 # ===============================
 # AUTH / USER SCHEMAS
@@ -26,6 +26,7 @@ class MenuItemBase(BaseModel):
     price: float
     category: Optional[str] = "General"
     is_available: bool = True
+    stock: Optional[int] = Field(None, ge=0, description="Units left; null = not tracked")
 
 
 class MenuItemCreate(MenuItemBase):
@@ -38,14 +39,34 @@ class MenuItemUpdate(BaseModel):
     price: Optional[float] = None
     category: Optional[str] = None
     is_available: Optional[bool] = None
+    stock: Optional[int] = Field(None, ge=0)
 
 
 class MenuItemResponse(MenuItemBase):
     id: int
     created_at: datetime
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class MenuListItem(MenuItemResponse):
+    # Stock changes with every order; the cached listing leaves it out
+    # (GET /menu/{id} has it)
+    stock: Optional[int] = Field(None, exclude=True)
+
+
+class MenuBulkResult(BaseModel):
+    created: int
+    updated: int
+
+
+class RestockItem(BaseModel):
+    menu_item_id: int
+    quantity: int = Field(gt=0, description="Units to add")
+
+
+class MenuRestock(BaseModel):
+    items: List[RestockItem] = Field(min_length=1)
 
 
 # ===============================
@@ -65,16 +86,94 @@ class OrderItemResponse(BaseModel):
     quantity: int
     unit_price: float
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class OrderResponse(BaseModel):
     id: int
     total_amount: float
     status: str
+    version: int
     created_at: datetime
     items: List[OrderItemResponse]
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class OrderTicket(BaseModel):
+    """
+    Returned with 202 Accepted when orders are written behind;
+    poll status_url until the status is "created" or "failed".
+    """
+    ticket: str
+    status: Literal["queued", "created", "failed"]
+    status_url: str
+    total_amount: float
+    detail: Optional[str] = None
+    order: Optional[OrderResponse] = None
+
+
+class OrderStatusUpdate(BaseModel):
+    status: Literal["pending", "preparing", "ready", "paid", "cancelled"]
+    version: int = Field(description="Version of the order the change is based on")
+
+
+# ===============================
+# REPORT SCHEMAS
+# ===============================
+class RevenueBucket(BaseModel):
+    period: datetime
+    order_count: int
+    items_sold: int
+    revenue: float
+
+
+class DailyRevenue(BaseModel):
+    day: date
+    order_count: int
+    items_sold: int
+    revenue: float
+
+
+class ItemSales(BaseModel):
+    menu_item_id: int
+    name: str
+    quantity: int
+    revenue: float
+
+
+class CategorySales(BaseModel):
+    category: str
+    quantity: int
+    revenue: float
+
+
+class SalesSummary(BaseModel):
+    order_count: int
+    items_sold: int
+    revenue: float
+    average_ticket: float
+
+
+class StoreSalesSummary(SalesSummary):
+    store: Optional[str] = Field(description="Store id; null = main database")
+
+
+class CrossStoreSales(BaseModel):
+    stores: List[StoreSalesSummary]
+    total: SalesSummary
+
+
+# ===============================
+# INSTRUMENTATION SCHEMAS
+# ===============================
+class ProfilingSettings(BaseModel):
+    sample_rate: float = Field(ge=0, le=1, description="Fraction of requests to profile")
+
+
+class ProfileReport(BaseModel):
+    method: str
+    route: str
+    seconds: float
+    at: float
+    stats: str
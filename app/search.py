@@ -0,0 +1,112 @@
+# app/search.py
+"""
+Full-text search over menu item names and descriptions.
+
+On SQLite the `menu_items_fts` FTS5 table mirrors `menu_items` through
+triggers, so every insert / update / delete (including bulk imports)
+keeps it in sync without application code. Where FTS5 isn't available
+(other databases, SQLite builds without it, databases created before
+the index existed) search falls back to LIKE.
+"""
+
+import re
+from typing import Dict, Optional
+
+from sqlalchemy import column, or_, text
+
+MENU_FTS_TABLE = "menu_items_fts"
+
+MENU_FTS_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {MENU_FTS_TABLE} USING fts5(
+        name, description, content='menu_items', content_rowid='id'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS menu_items_fts_ai AFTER INSERT ON menu_items BEGIN
+        INSERT INTO {MENU_FTS_TABLE}(rowid, name, description)
+        VALUES (new.id, new.name, coalesce(new.description, ''));
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS menu_items_fts_ad AFTER DELETE ON menu_items BEGIN
+        INSERT INTO {MENU_FTS_TABLE}({MENU_FTS_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, coalesce(old.description, ''));
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS menu_items_fts_au AFTER UPDATE OF name, description ON menu_items BEGIN
+        INSERT INTO {MENU_FTS_TABLE}({MENU_FTS_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, coalesce(old.description, ''));
+        INSERT INTO {MENU_FTS_TABLE}(rowid, name, description)
+        VALUES (new.id, new.name, coalesce(new.description, ''));
+    END
+    """,
+    # Index rows that existed before the FTS table
+    f"INSERT INTO {MENU_FTS_TABLE}({MENU_FTS_TABLE}) VALUES ('rebuild')",
+]
+
+
+def install_menu_fts(connection) -> bool:
+    """
+    Create the FTS5 table and its triggers. Returns False when the
+    database can't host them (not SQLite, or no FTS5 support).
+    """
+    if connection.dialect.name != "sqlite":
+        return False
+    try:
+        with connection.begin_nested():
+            for statement in MENU_FTS_DDL:
+                connection.exec_driver_sql(statement)
+    except Exception:
+        return False
+    return True
+
+
+def _fts_query(q: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 query: every word must match, as a prefix.
+    """
+    words = re.findall(r"\w+", q)
+    if not words:
+        return None
+    return " ".join('"%s"*' % word for word in words)
+
+
+# Per-database answer of fts_available(), checked once per process
+_fts_available: Dict[str, bool] = {}
+
+
+async def fts_available(db) -> bool:
+    bind = db.bind
+    key = str(bind.url)
+    if key not in _fts_available:
+        found = False
+        if bind.dialect.name == "sqlite":
+            result = await db.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": MENU_FTS_TABLE}
+            )
+            found = result.first() is not None
+        _fts_available[key] = found
+    return _fts_available[key]
+
+
+def menu_search_clause(menu_item_model, q: str, use_fts: bool):
+    """
+    WHERE clause matching `q` against name / description.
+    """
+    fts_query = _fts_query(q) if use_fts else None
+    if fts_query:
+        matches = text(
+            f"SELECT rowid FROM {MENU_FTS_TABLE} WHERE {MENU_FTS_TABLE} MATCH :fts_query"
+        ).bindparams(fts_query=fts_query).columns(column("rowid"))
+        return menu_item_model.id.in_(matches)
+
+    # % and _ in the search text match themselves
+    escaped = re.sub(r"([\\%_])", r"\\\1", q.strip())
+    pattern = f"%{escaped}%"
+    return or_(
+        menu_item_model.name.ilike(pattern, escape="\\"),
+        menu_item_model.description.ilike(pattern, escape="\\"),
+    )
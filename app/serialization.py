@@ -0,0 +1,54 @@
+# app/serialization.py
+"""
+Fast JSON paths for response models.
+
+FastAPI normally validates a route's return value against its
+response_model, dumps it to Python objects and then encodes those with
+json.dumps. For ORM results we already trust, orm_response() validates
+once (from attributes) and lets pydantic-core write the JSON bytes
+directly.
+"""
+
+from functools import lru_cache
+from typing import Any, Mapping, Optional
+
+import pydantic_core
+from fastapi.responses import JSONResponse, Response
+from pydantic import TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def type_adapter(tp: Any) -> TypeAdapter:
+    return TypeAdapter(tp)
+
+
+def orm_json(tp: Any, obj: Any) -> bytes:
+    """
+    Encode ORM object(s) as `tp` (e.g. List[OrderResponse]) to JSON bytes.
+    """
+    adapter = type_adapter(tp)
+    return adapter.dump_json(adapter.validate_python(obj, from_attributes=True))
+
+
+def orm_response(
+    tp: Any,
+    obj: Any,
+    status_code: int = 200,
+    headers: Optional[Mapping[str, str]] = None
+) -> Response:
+    return Response(
+        content=orm_json(tp, obj),
+        status_code=status_code,
+        media_type="application/json",
+        headers=headers
+    )
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Drop-in default_response_class encoding with pydantic-core's Rust
+    serializer (orjson-like speed, no extra dependency).
+    """
+
+    def render(self, content: Any) -> bytes:
+        return pydantic_core.to_json(content)
@@ -0,0 +1,205 @@
+# app/server.py
+"""
+Production server: python -m app serve
+
+A small pre-fork supervisor around uvicorn:
+
+- The app is imported once in the parent (preload), so workers share
+  the import cost and copy-on-write memory, and the schema versions
+  (main and store databases) are checked once before any worker starts.
+- The parent binds the listening socket and forks WEB_CONCURRENCY
+  workers that all accept on it. Each worker drops the database pools
+  inherited from the parent (database.reset_after_fork) before serving.
+- SIGTERM / SIGINT on the parent is forwarded to the workers, which stop
+  accepting, mark themselves not ready (/health/ready -> 503), finish
+  in-flight requests for up to SHUTDOWN_GRACE_SECONDS and run the app's
+  shutdown (flushing the write-behind order queue).
+- Workers that die unexpectedly are replaced.
+
+With ORDER_WRITE_BEHIND, queued orders, their tickets and their
+Idempotency-Keys live in the memory of the worker that accepted them,
+so a ticket poll or retry reaching another worker wouldn't find them:
+serve() then runs a single worker.
+
+Platforms without fork() (Windows) run a single uvicorn process.
+"""
+
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+from typing import Dict
+
+import uvicorn
+
+from . import config
+
+# Delay before replacing a worker that exited on its own
+RESPAWN_DELAY_SECONDS = 1.0
+# A worker dying sooner than this after starting is treated as a
+# startup failure: give up instead of respawning in a loop
+MIN_WORKER_UPTIME_SECONDS = 5.0
+
+
+class WorkerServer(uvicorn.Server):
+    """
+    uvicorn server that reports itself draining as soon as it is asked
+    to exit, while in-flight requests are still being finished.
+    """
+
+    def handle_exit(self, sig, frame):
+        from .routes import health
+
+        health.start_draining()
+        super().handle_exit(sig, frame)
+
+
+def _uvicorn_config(app, host: str, port: int) -> uvicorn.Config:
+    return uvicorn.Config(
+        app,
+        host=host,
+        port=port,
+        timeout_graceful_shutdown=config.SHUTDOWN_GRACE_SECONDS,
+        proxy_headers=True,
+    )
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Supervisor:
+    def __init__(self, app, sock: socket.socket, host: str, port: int, workers: int):
+        self.app = app
+        self.sock = sock
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.children: Dict[int, float] = {}  # pid -> started at
+        self.stopping = False
+        self.exit_code = 0
+
+    def spawn(self) -> None:
+        pid = os.fork()
+        if pid:
+            self.children[pid] = time.monotonic()
+            return
+
+        # Worker: default signal handling (uvicorn installs its own)
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGQUIT):
+            signal.signal(sig, signal.SIG_DFL)
+
+        from .database import reset_after_fork
+
+        reset_after_fork()
+        code = 0
+        try:
+            WorkerServer(_uvicorn_config(self.app, self.host, self.port)).run(sockets=[self.sock])
+        except Exception:
+            traceback.print_exc()
+            code = 1
+        finally:
+            os._exit(code)
+
+    def stop(self, sig, frame) -> None:
+        self.stopping = True
+
+    def run(self) -> int:
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGQUIT):
+            signal.signal(sig, self.stop)
+
+        print(f"Serving on http://{self.host}:{self.port} with {self.workers} workers (pid {os.getpid()})")
+        for _ in range(self.workers):
+            self.spawn()
+
+        while not self.stopping:
+            time.sleep(0.2)
+            for pid, uptime in self._reap():
+                if self.stopping:
+                    continue
+                if uptime < MIN_WORKER_UPTIME_SECONDS:
+                    print(f"Worker {pid} exited during startup, shutting down", file=sys.stderr)
+                    self.stopping = True
+                    self.exit_code = 1
+                    break
+                print(f"Worker {pid} exited, starting a replacement", file=sys.stderr)
+                time.sleep(RESPAWN_DELAY_SECONDS)
+                self.spawn()
+
+        self.shutdown()
+        return self.exit_code
+
+    def shutdown(self) -> None:
+        print(f"Draining {len(self.children)} workers")
+        for pid in list(self.children):
+            self._signal(pid, signal.SIGTERM)
+
+        deadline = time.monotonic() + config.SHUTDOWN_GRACE_SECONDS + 5
+        while self.children and time.monotonic() < deadline:
+            time.sleep(0.1)
+            self._reap()
+
+        for pid in list(self.children):
+            print(f"Worker {pid} did not stop in time, killing it", file=sys.stderr)
+            self._signal(pid, signal.SIGKILL)
+        while self.children:
+            self._reap()
+            time.sleep(0.05)
+
+        self.sock.close()
+
+    def _reap(self):
+        exited = []
+        while self.children:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.children.clear()
+                break
+            if pid == 0:
+                break
+            started_at = self.children.pop(pid, None)
+            if started_at is not None:
+                exited.append((pid, time.monotonic() - started_at))
+        return exited
+
+    def _signal(self, pid: int, sig) -> None:
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            self.children.pop(pid, None)
+
+
+def serve(host: str, port: int, workers: int) -> None:
+    # Preload: import the app and check the schema once, in the parent
+    from .database import engine
+    from .main import app
+    from .migrations import verify_schema
+    from .stores import verify_store_schemas
+
+    verify_schema(engine)
+    verify_store_schemas()
+    # Don't hand the parent's connection to the workers
+    engine.dispose()
+
+    if config.ORDER_WRITE_BEHIND and workers > 1:
+        print(
+            f"ORDER_WRITE_BEHIND keeps queued orders in one process; "
+            f"running 1 worker instead of {workers}",
+            file=sys.stderr
+        )
+        workers = 1
+
+    if not hasattr(os, "fork") or workers <= 1:
+        WorkerServer(_uvicorn_config(app, host, port)).run()
+        return
+
+    sys.exit(Supervisor(app, _bind(host, port), host, port, workers).run())
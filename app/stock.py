@@ -0,0 +1,103 @@
+# app/stock.py
+"""
+Per-item stock counts (menu_items.stock, NULL = not tracked).
+
+Placing an order takes its stock with one conditional UPDATE per
+distinct tracked item, in the order's transaction:
+
+    UPDATE menu_items
+       SET stock = stock - :q,
+           is_available = CASE WHEN stock > :q THEN is_available ELSE false END
+     WHERE id = :id AND stock >= :q
+    RETURNING stock
+
+The check and the decrement are one statement, so concurrent orders
+can't oversell: whichever runs second sees the decremented count and
+matches no row. No row back means not enough stock; the caller rolls
+the transaction back, which also undoes the order's other decrements.
+An item that reaches zero stops being available in the same statement.
+
+Items are updated in id order, so concurrent orders lock rows in the
+same order on databases with row locks. No row is read first and no
+table lock is taken.
+"""
+
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from sqlalchemy import case, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import MenuItem
+
+
+class OutOfStock(Exception):
+    def __init__(self, menu_item_id: int):
+        self.menu_item_id = menu_item_id
+        super().__init__(f"Menu item {menu_item_id} is out of stock")
+
+
+def stock_availability(changes: Dict[str, Any], current_stock: Optional[int]) -> Dict[str, Any]:
+    """
+    `changes` (menu item columns about to be written, None stock for a
+    new item) with is_available kept in step with a stock change, as
+    orders and restocks do: stock 0 makes the item unavailable, stock
+    for a sold-out item makes it available again. An explicit
+    is_available in `changes` wins.
+    """
+    if "stock" in changes and "is_available" not in changes:
+        if changes["stock"] == 0:
+            changes["is_available"] = False
+        elif current_stock == 0 and changes["stock"] is not None:
+            changes["is_available"] = True
+    return changes
+
+
+def requested_stock(
+    lines: Iterable[Tuple[int, int, int]],
+    menu_items: Mapping[int, MenuItem]
+) -> Dict[int, int]:
+    """
+    Total quantity per tracked menu item for order lines
+    (menu_item_id, quantity, unit_price_cents).
+    """
+    wanted: Dict[int, int] = {}
+    for menu_item_id, quantity, _ in lines:
+        if menu_items[menu_item_id].stock is not None:
+            wanted[menu_item_id] = wanted.get(menu_item_id, 0) + quantity
+    return wanted
+
+
+def short_item(wanted: Mapping[int, int], menu_items: Mapping[int, MenuItem]) -> Optional[int]:
+    """
+    First item whose last known stock can't cover the order; a cheap
+    early rejection before take_stock() decides for real.
+    """
+    for menu_item_id, quantity in wanted.items():
+        if menu_items[menu_item_id].stock < quantity:
+            return menu_item_id
+    return None
+
+
+async def take_stock(db: AsyncSession, wanted: Mapping[int, int]) -> List[int]:
+    """
+    Decrement stock for every item in `wanted`. Returns the ids of items
+    that sold out; raises OutOfStock (roll back!) if one is short.
+    """
+    sold_out = []
+    for menu_item_id in sorted(wanted):
+        quantity = wanted[menu_item_id]
+        remaining = await db.scalar(
+            update(MenuItem)
+            .where(MenuItem.id == menu_item_id, MenuItem.stock >= quantity)
+            .values(
+                stock=MenuItem.stock - quantity,
+                is_available=case((MenuItem.stock > quantity, MenuItem.is_available), else_=False)
+            )
+            .returning(MenuItem.stock)
+            .execution_options(synchronize_session=False)
+        )
+        if remaining is None:
+            raise OutOfStock(menu_item_id)
+        if remaining == 0:
+            sold_out.append(menu_item_id)
+    return sold_out
@@ -0,0 +1,195 @@
+# app/stores.py
+"""
+One database per café location (STORES).
+
+A request picks its store with a path prefix (/stores/<store>/menu/)
+or an X-Store-Id header; requests without one use the main database
+(DATABASE_URL), exactly as before. Each store has its own database
+(STORE_DATABASE_URL with {store} filled in) holding its menu, orders,
+stock, rollups and idempotency keys, so every location writes to its
+own SQLite file and writer lock. Accounts stay in the main database
+(get_users_db), so one login works in every store; orders.user_id in a
+store database refers to those accounts and has no foreign key there
+(migration v0009).
+
+StoreMiddleware sets `current_store` for the request; get_async_db
+opens its session on that store's engine. Engines are created on
+first use and at most STORE_ENGINES_MAX are kept open (least recently
+used are disposed).
+
+Store databases are migrated like the main one:
+
+    python -m app.migrations --all-stores upgrade
+"""
+
+import asyncio
+import os
+import re
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import List, Optional, Set, Tuple
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from . import config
+from .database import AsyncSessionLocal, configure_engine, engine_options, is_sqlite, to_async_url
+
+STORE_HEADER = "x-store-id"
+STORE_PATH_PREFIX = "/stores/"
+STORE_ID = re.compile(r"^[a-z0-9][a-z0-9_-]{0,62}$")
+
+# Store of the current request; None = the main database
+current_store: ContextVar[Optional[str]] = ContextVar("current_store", default=None)
+
+
+def store_url(store: str) -> str:
+    return config.STORE_DATABASE_URL.format(store=store)
+
+
+def _prepare(url: str) -> None:
+    # SQLite creates the file but not its directory
+    if is_sqlite(url):
+        database = make_url(url).database
+        if database and database != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(database)), exist_ok=True)
+
+
+def store_engine(store: Optional[str]) -> Engine:
+    """
+    A new sync engine for `store` (None = the main database), for
+    scripts and startup checks; dispose() it when done.
+    """
+    url = config.DATABASE_URL if store is None else store_url(store)
+    _prepare(url)
+    return configure_engine(create_engine(url, **engine_options(url)), url)
+
+
+def verify_store_schemas() -> None:
+    """
+    Startup check that every configured store database is at head.
+    """
+    from .migrations import SchemaVersionError, verify_schema
+
+    for store in config.STORES:
+        if not STORE_ID.match(store):
+            raise ValueError(f"Invalid store id {store!r} in STORES")
+        engine = store_engine(store)
+        try:
+            verify_schema(engine)
+        except SchemaVersionError as exc:
+            raise SchemaVersionError(f"Store '{store}': {exc}") from None
+        finally:
+            engine.dispose()
+
+
+# ===============================
+# ENGINE REGISTRY
+# ===============================
+class StoreRegistry:
+    """
+    Async engines and session factories per store, created lazily and
+    bounded LRU. Used from the event loop only.
+    """
+
+    def __init__(self, max_engines: int):
+        self.max_engines = max_engines
+        self._engines: "OrderedDict[str, Tuple[AsyncEngine, async_sessionmaker]]" = OrderedDict()
+        self._disposing: Set[asyncio.Task] = set()
+        self.created = 0
+        self.evicted = 0
+
+    def sessionmaker(self, store: Optional[str]) -> async_sessionmaker:
+        if store is None:
+            return AsyncSessionLocal
+
+        entry = self._engines.get(store)
+        if entry is not None:
+            self._engines.move_to_end(store)
+            return entry[1]
+
+        url = store_url(store)
+        _prepare(url)
+        engine = create_async_engine(to_async_url(url), **engine_options(url))
+        configure_engine(engine.sync_engine, url)
+        factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+        self._engines[store] = (engine, factory)
+        self.created += 1
+
+        while len(self._engines) > self.max_engines:
+            _, (evicted, _) = self._engines.popitem(last=False)
+            self.evicted += 1
+            # Sessions still using it keep their connection until they close
+            task = asyncio.get_running_loop().create_task(evicted.dispose())
+            self._disposing.add(task)
+            task.add_done_callback(self._disposing.discard)
+
+        return factory
+
+    @property
+    def open_stores(self) -> List[str]:
+        return list(self._engines)
+
+    async def dispose(self) -> None:
+        while self._engines:
+            _, (engine, _) = self._engines.popitem()
+            await engine.dispose()
+        if self._disposing:
+            await asyncio.gather(*self._disposing)
+
+
+store_registry = StoreRegistry(config.STORE_ENGINES_MAX)
+
+
+def session_for(store: Optional[str]):
+    """
+    New AsyncSession on `store`'s database (None = main database).
+    """
+    return store_registry.sessionmaker(store)()
+
+
+# ===============================
+# REQUEST ROUTING
+# ===============================
+class StoreMiddleware:
+    """
+    Resolves the request's store from /stores/<store>/... (moved into
+    root_path, so routes and url_for work unchanged) or X-Store-Id, and
+    answers 404 for stores that aren't configured.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        store = None
+        root_path = scope.get("root_path", "")
+        path = scope["path"]
+        route_path = path[len(root_path):] if root_path and path.startswith(root_path) else path
+
+        if route_path.startswith(STORE_PATH_PREFIX):
+            store = route_path[len(STORE_PATH_PREFIX):].split("/", 1)[0]
+            scope = dict(scope, root_path=root_path + STORE_PATH_PREFIX + store)
+        else:
+            for name, value in scope["headers"]:
+                if name == STORE_HEADER.encode():
+                    store = value.decode("latin-1").strip()
+                    break
+
+        if store is not None and store not in config.STORES:
+            response = JSONResponse({"detail": f"Unknown store '{store}'"}, status_code=404)
+            await response(scope, receive, send)
+            return
+
+        token = current_store.set(store)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_store.reset(token)
@@ -0,0 +1,282 @@
+# benchmark.py
+"""
+Latency / throughput benchmark for the API.
+
+Seeds a fresh database (see seed.seed_bulk), then drives the app either
+in-process through an ASGI client or against a running server, and
+reports p50/p95/p99 latency and requests/second per scenario.
+
+    python benchmark.py --orders 200000 --concurrency 32 --output bench.json
+    python benchmark.py --compare bench.json   # fail on p95 regressions
+    python benchmark.py --write-behind         # POST /orders/ via group commit
+
+Requires httpx (pip install httpx).
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+SCENARIOS = ["menu", "orders_list", "orders_create", "login"]
+
+
+def percentile(sorted_values, pct):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    ms = [value * 1000 for value in latencies]
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(ms) / len(ms), 3) if ms else 0.0,
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p95_ms": round(percentile(ms, 95), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+        "max_ms": round(ms[-1], 3) if ms else 0.0,
+    }
+
+
+async def run_scenario(client, make_request, total, concurrency):
+    """
+    Issue `total` requests from `concurrency` workers.
+    make_request(client, rng) -> awaitable response.
+    """
+    latencies = []
+    errors = 0
+    issued = 0
+
+    async def worker(worker_id):
+        nonlocal errors, issued
+        rng = random.Random(worker_id)
+        while issued < total:
+            issued += 1
+            start = time.perf_counter()
+            try:
+                response = await make_request(client, rng)
+                ok = response.status_code < 400
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+async def run_benchmarks(args, dataset):
+    import httpx
+
+    if args.base_url:
+        transport = None
+        base_url = args.base_url
+    else:
+        from app.main import app
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://bench"
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with contextlib.AsyncExitStack() as stack:
+        if transport is not None:
+            # ASGITransport doesn't run the lifespan: run it here, so queued
+            # orders are flushed and the database engines closed at the end
+            await stack.enter_async_context(app.router.lifespan_context(app))
+        client = await stack.enter_async_context(httpx.AsyncClient(
+            transport=transport, base_url=base_url, limits=limits, timeout=60
+        ))
+        return await run_all(client, args, dataset)
+
+
+async def run_all(client, args, dataset):
+    admin, staff = dataset["usernames"][0], dataset["usernames"][1:] or dataset["usernames"]
+    password = dataset["password"]
+
+    response = await client.post(
+        "/auth/login", data={"username": admin, "password": password}
+    )
+    response.raise_for_status()
+    admin_headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    menu_ids = dataset["menu_item_ids"]
+
+    async def menu(client, rng):
+        return await client.get("/menu/")
+
+    async def orders_list(client, rng):
+        return await client.get("/orders/", headers=admin_headers)
+
+    async def orders_create(client, rng):
+        lines = rng.sample(menu_ids, min(len(menu_ids), rng.randint(1, 5)))
+        return await client.post("/orders/", json={
+            "items": [{"menu_item_id": i, "quantity": rng.randint(1, 3)} for i in lines]
+        })
+
+    async def login(client, rng):
+        return await client.post(
+            "/auth/login",
+            data={"username": rng.choice(staff), "password": password}
+        )
+
+    requests = {
+        "menu": menu,
+        "orders_list": orders_list,
+        "orders_create": orders_create,
+        "login": login,
+    }
+
+    results = {}
+    for name in args.scenarios:
+        # Logins are deliberately expensive; scale them down
+        total = max(1, args.requests // 10) if name == "login" else args.requests
+        await run_scenario(client, requests[name], min(total, args.warmup), args.concurrency)
+        results[name] = await run_scenario(client, requests[name], total, args.concurrency)
+        print(
+            f"{name:14} {results[name]['requests']:>7} req  "
+            f"{results[name]['rps']:>9.1f} rps  "
+            f"p50 {results[name]['p50_ms']:>8.2f} ms  "
+            f"p95 {results[name]['p95_ms']:>8.2f} ms  "
+            f"p99 {results[name]['p99_ms']:>8.2f} ms  "
+            f"errors {results[name]['errors']}"
+        )
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline_path, results, max_regression):
+    """
+    Print p95 deltas against a previous run; return False on regression.
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+
+    ok = True
+    for name, current in results.items():
+        before = baseline.get(name)
+        if not before or not before["p95_ms"]:
+            continue
+        change = (current["p95_ms"] - before["p95_ms"]) / before["p95_ms"]
+        flag = ""
+        if change > max_regression:
+            flag = "  REGRESSION"
+            ok = False
+        print(f"{name:14} p95 {before['p95_ms']:>8.2f} -> {current['p95_ms']:>8.2f} ms ({change:+.1%}){flag}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Cafe Management System API")
+    parser.add_argument("--db", default="./bench.db", help="SQLite file to seed (recreated)")
+    parser.add_argument("--base-url", help="benchmark a running server instead of in-process")
+    parser.add_argument("--no-seed", action="store_true", help="reuse an already seeded --db")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--items", type=int, default=50)
+    parser.add_argument("--orders", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per scenario")
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=42, help="random seed for the dataset")
+    parser.add_argument("--write-behind", action="store_true",
+                        help="in-process only: set ORDER_WRITE_BEHIND (202 + group commit)")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="previous JSON output to compare p95 against")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="allowed p95 increase before --compare fails (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    args.scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    try:
+        import httpx  # noqa: F401
+    except ImportError:
+        sys.exit("benchmark.py needs httpx: pip install httpx")
+
+    # Must be set before the app (and its engine) is imported
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.db}"
+    if args.write_behind:
+        os.environ["ORDER_WRITE_BEHIND"] = "true"
+    if not args.no_seed:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.db + suffix):
+                os.remove(args.db + suffix)
+
+    from seed import seed_bulk
+
+    if args.no_seed:
+        from sqlalchemy import select
+        from app.database import SessionLocal
+        from app.models import MenuItem, User
+
+        db = SessionLocal()
+        dataset = {
+            "usernames": list(db.scalars(
+                select(User.username).where(User.username.like("bench_user_%")).order_by(User.id)
+            )),
+            "menu_item_ids": list(db.scalars(select(MenuItem.id))),
+            "password": "bench123",
+        }
+        db.close()
+    else:
+        dataset = seed_bulk(
+            users=args.users, items=args.items, orders=args.orders, random_seed=args.seed
+        )
+
+    results = asyncio.run(run_benchmarks(args, dataset))
+
+    report = {
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "params": {
+            "users": args.users,
+            "items": args.items,
+            "orders": args.orders,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "target": args.base_url or "in-process",
+            "write_behind": args.write_behind,
+        },
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare and not compare(args.compare, results, args.max_regression):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
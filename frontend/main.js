@@ -1,7 +1,11 @@
 /* =========================
    CONFIG Wuuuuuuui
 ========================= */
-const API_URL = "http://127.0.0.1:8000";
+// Same origin when served by the API (/app/ or /stores/<store>/app/);
+// the local API when the page is opened from disk
+const API_URL = window.location.protocol === "file:"
+    ? "http://127.0.0.1:8000"
+    : (window.location.pathname.match(/^\/stores\/[^/]+/) || [""])[0];
 const CURRENCY = "KES";
 
 /* =========================
@@ -22,7 +26,7 @@ function logout() {
    - ALWAYS sends JSON headers
    - Adds Authorization only if needed
 ========================= */
-async function apiFetch(url, options = {}) {
+async function apiResponse(url, options = {}) {
     const headers = {
         "Content-Type": "application/json",
         ...(options.headers || {}),
@@ -46,7 +50,11 @@ async function apiFetch(url, options = {}) {
         throw new Error(err.detail || "Request failed");
     }
 
-    return response.json();
+    return response;
+}
+
+async function apiFetch(url, options = {}) {
+    return (await apiResponse(url, options)).json();
 }
 
 /* =========================
@@ -97,6 +105,15 @@ function protectPage(requiredRole) {
 let menuItems = [];
 let cart = [];
 
+// Reused when the same cart is submitted again (e.g. after a network
+// error), so the server can tell a retry from a new order
+let pendingOrderKey = null;
+
+function newIdempotencyKey() {
+    if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+    return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+}
+
 /* ---------- Load Menu ---------- */
 async function loadMenu() {
     const menuDiv = document.getElementById("menuList");
@@ -121,6 +138,8 @@ function addToCart(itemId) {
     if (!item) return;
 
     const existing = cart.find(i => i.menu_item_id === itemId);
+    pendingOrderKey = null; // cart changed: this is a new order
+
     if (existing) {
         existing.quantity += 1;
     } else {
@@ -159,16 +178,39 @@ function renderCart() {
 }
 
 /* ---------- Submit Order ---------- */
+// With write-behind ordering the API answers 202 with a ticket; the
+// order only counts as placed once the ticket says "created"
+const TICKET_POLL_MS = 500;
+const TICKET_TIMEOUT_MS = 30000;
+
+async function waitForTicket(ticket) {
+    const deadline = Date.now() + TICKET_TIMEOUT_MS;
+    while (ticket.status === "queued") {
+        if (Date.now() > deadline) {
+            throw new Error("still being processed, check your order history shortly");
+        }
+        await new Promise(resolve => setTimeout(resolve, TICKET_POLL_MS));
+        ticket = await apiFetch(ticket.status_url, { auth: false });
+    }
+    if (ticket.status === "failed") {
+        throw new Error(ticket.detail || "the order could not be saved");
+    }
+    return ticket.order;
+}
+
 async function submitOrder() {
     if (cart.length === 0) {
         alert("Order is empty");
         return;
     }
 
+    pendingOrderKey = pendingOrderKey || newIdempotencyKey();
+
     try {
-        await apiFetch(`${API_URL}/orders/`, {
+        const response = await apiResponse(`${API_URL}/orders/`, {
             method: "POST",
             auth: false, // guests allowed
+            headers: { "Idempotency-Key": pendingOrderKey },
             body: JSON.stringify({
                 items: cart.map(item => ({
                     menu_item_id: item.menu_item_id,
@@ -176,8 +218,10 @@ async function submitOrder() {
                 }))
             })
         });
+        if (response.status === 202) await waitForTicket(await response.json());
 
         cart = [];
+        pendingOrderKey = null;
         renderCart();
         alert("Order placed successfully!");
     } catch (err) {
@@ -188,7 +232,26 @@ async function submitOrder() {
 /* =========================
    ORDER HISTORY (LOGGED IN)
 ========================= */
-async function loadOrders() {
+// Next page of the order history (X-Next-Cursor), null when done
+let ordersCursor = null;
+
+function renderOrder(order) {
+    return `
+        <div class="card">
+            <h3>Order #${order.id}</h3>
+            <p>${new Date(order.created_at).toLocaleString()}</p>
+            <ul>
+                ${order.items.map(i =>
+                    `<li>${i.quantity} × ${i.menu_item_id} @ ${CURRENCY} ${i.unit_price.toFixed(2)}</li>`
+                ).join("")}
+            </ul>
+            <strong>Total: ${CURRENCY} ${order.total_amount.toFixed(2)}</strong>
+        </div>
+    `;
+}
+
+// GET /orders/ returns one page; "Load more" follows X-Next-Cursor
+async function loadOrders(more = false) {
     const ordersDiv = document.getElementById("ordersList");
     if (!ordersDiv) return;
 
@@ -198,20 +261,22 @@ async function loadOrders() {
     }
 
     try {
-        const orders = await apiFetch(`${API_URL}/orders/`);
-
-        ordersDiv.innerHTML = orders.map(order => `
-            <div class="card">
-                <h3>Order #${order.id}</h3>
-                <p>${new Date(order.created_at).toLocaleString()}</p>
-                <ul>
-                    ${order.items.map(i =>
-                        `<li>${i.quantity} × ${i.menu_item_id} @ ${CURRENCY} ${i.unit_price.toFixed(2)}</li>`
-                    ).join("")}
-                </ul>
-                <strong>Total: ${CURRENCY} ${order.total_amount.toFixed(2)}</strong>
-            </div>
-        `).join("");
+        const query = more && ordersCursor ? `?cursor=${encodeURIComponent(ordersCursor)}` : "";
+        const response = await apiResponse(`${API_URL}/orders/${query}`);
+        const orders = await response.json();
+        ordersCursor = response.headers.get("X-Next-Cursor");
+
+        document.getElementById("moreOrders")?.remove();
+        const html = orders.map(renderOrder).join("");
+        if (more) ordersDiv.insertAdjacentHTML("beforeend", html);
+        else ordersDiv.innerHTML = html;
+
+        if (ordersCursor) {
+            ordersDiv.insertAdjacentHTML(
+                "beforeend",
+                `<button id="moreOrders" class="secondary" onclick="loadOrders(true)">Load more</button>`
+            );
+        }
     } catch (err) {
         ordersDiv.innerHTML = `<p>Error: ${err.message}</p>`;
     }
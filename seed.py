@@ -1,6 +1,13 @@
 # seed.py
-from app.database import SessionLocal
-from app import models, auth
+import argparse
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select
+
+from app.database import SessionLocal, engine
+from app import models, auth, migrations
+from app.rollups import rebuild_rollups
 
 def seed():
     db = SessionLocal()
@@ -17,5 +24,116 @@ def seed():
 
     print("✅ Database seeded successfully")
 
+
+# Bulk dataset for benchmarks / load tests
+# Uses Core multi-row inserts: hundreds of thousands of orders in seconds
+def seed_bulk(
+    users: int = 100,
+    items: int = 50,
+    orders: int = 10000,
+    max_lines: int = 5,
+    days: int = 365,
+    password: str = "bench123",
+    batch_size: int = 5000,
+    random_seed: int = 42
+):
+    rng = random.Random(random_seed)
+    migrations.upgrade(engine)
+
+    # One argon2 hash shared by every bench user (hashing is deliberately slow)
+    password_hash = auth.hash_password(password)
+    now = datetime.utcnow()
+
+    with engine.begin() as conn:
+        first_user = (conn.scalar(select(func.max(models.User.id))) or 0) + 1
+        conn.execute(insert(models.User), [
+            {
+                "id": first_user + i,
+                "username": f"bench_user_{first_user + i}",
+                "password_hash": password_hash,
+                "role": "admin" if i == 0 else "staff",
+                "created_at": now,
+            }
+            for i in range(users)
+        ])
+        user_ids = list(range(first_user, first_user + users))
+
+        first_item = (conn.scalar(select(func.max(models.MenuItem.id))) or 0) + 1
+        menu_rows = [
+            {
+                "id": first_item + i,
+                "name": f"Bench Item {first_item + i}",
+                "description": "",
+                "price_cents": rng.randint(5000, 80000),
+                "category": rng.choice(["Coffee", "Tea", "Bakery", "Food", "Drinks"]),
+                "is_available": True,
+                "created_at": now,
+            }
+            for i in range(items)
+        ]
+        conn.execute(insert(models.MenuItem), menu_rows)
+        prices = {row["id"]: row["price_cents"] for row in menu_rows}
+
+    next_order = None
+    remaining = orders
+    while remaining > 0:
+        count = min(batch_size, remaining)
+        with engine.begin() as conn:
+            if next_order is None:
+                next_order = (conn.scalar(select(func.max(models.Order.id))) or 0) + 1
+
+            order_rows, item_rows = [], []
+            for order_id in range(next_order, next_order + count):
+                total = 0
+                for menu_item_id in rng.sample(list(prices), rng.randint(1, max_lines)):
+                    quantity = rng.randint(1, 3)
+                    total += prices[menu_item_id] * quantity
+                    item_rows.append({
+                        "order_id": order_id,
+                        "menu_item_id": menu_item_id,
+                        "quantity": quantity,
+                        "unit_price_cents": prices[menu_item_id],
+                    })
+                order_rows.append({
+                    "id": order_id,
+                    "user_id": rng.choice(user_ids) if rng.random() < 0.7 else None,
+                    "total_amount_cents": total,
+                    "status": "paid",
+                    "created_at": now - timedelta(seconds=rng.randint(0, days * 86400)),
+                })
+
+            conn.execute(insert(models.Order), order_rows)
+            conn.execute(insert(models.OrderItem), item_rows)
+
+        next_order += count
+        remaining -= count
+
+    # The inserts above bypass create_order, so /reports/ would read
+    # empty rollups until they are rebuilt
+    db = SessionLocal()
+    try:
+        rebuild_rollups(db)
+    finally:
+        db.close()
+
+    print(f"✅ Seeded {users} users, {items} menu items, {orders} orders")
+    return {
+        "user_ids": user_ids,
+        "usernames": [f"bench_user_{i}" for i in user_ids],
+        "menu_item_ids": list(prices),
+        "password": password,
+    }
+
+
 if __name__ == "__main__":
-    seed()
+    parser = argparse.ArgumentParser(description="Seed the database")
+    parser.add_argument("--bulk", action="store_true", help="seed a large benchmark dataset")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--items", type=int, default=50)
+    parser.add_argument("--orders", type=int, default=10000)
+    args = parser.parse_args()
+
+    if args.bulk:
+        seed_bulk(users=args.users, items=args.items, orders=args.orders)
+    else:
+        seed()
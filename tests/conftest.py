@@ -0,0 +1,62 @@
+# tests/conftest.py
+"""
+Shared fixtures: one migrated SQLite database in a temporary directory
+for the whole session (set up before `app` is imported, since
+app/config.py reads the environment at import time).
+"""
+
+import os
+import sys
+import tempfile
+
+_work = tempfile.mkdtemp(prefix="cafe-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_work}/cafe.db"
+os.environ["ARCHIVE_DIR"] = os.path.join(_work, "archive")
+os.environ["STORE_DATABASE_URL"] = f"sqlite:///{_work}/stores/{{store}}.db"
+# Cheap hashes; the cost parameters don't matter here
+os.environ["ARGON2_TIME_COST"] = "1"
+os.environ["ARGON2_MEMORY_COST"] = "1024"
+os.environ["ARGON2_PARALLELISM"] = "1"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import auth, migrations, models
+from app.database import SessionLocal, engine
+
+migrations.upgrade(engine)
+
+ADMIN_PASSWORD = "admin12345"
+
+
+@pytest.fixture(scope="session")
+def client():
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    db = SessionLocal()
+    db.add(models.User(username="admin", password_hash=auth.hash_password(ADMIN_PASSWORD), role="admin"))
+    db.commit()
+    db.close()
+
+    response = client.post("/auth/login", data={"username": "admin", "password": ADMIN_PASSWORD})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def menu_item(client, admin_headers, request):
+    response = client.post(
+        "/menu/",
+        json={"name": f"Item {request.node.name}", "price": 2.5, "category": "Coffee"},
+        headers=admin_headers
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
@@ -0,0 +1,45 @@
+# tests/test_menu.py
+
+
+def test_bulk_upsert_rejects_non_utf8_body(client, admin_headers):
+    # Latin-1 "Café", as a spreadsheet might export it
+    body = "name,price\nCaf\xe9 Latte,3.5\n".encode("latin-1")
+    response = client.post(
+        "/menu/bulk",
+        content=body,
+        headers={**admin_headers, "Content-Type": "text/csv"}
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Body must be UTF-8"
+
+
+def test_bulk_upsert_keeps_availability_in_step_with_stock(client, admin_headers):
+    response = client.post(
+        "/menu/bulk",
+        content="name,price,stock\nBulk Sold Out,1.0,0\nBulk In Stock,2.0,3\n",
+        headers={**admin_headers, "Content-Type": "text/csv"}
+    )
+    assert response.status_code == 200, response.text
+
+    items = {item["name"]: item for item in client.get("/menu/").json()}
+    assert items["Bulk Sold Out"]["is_available"] is False
+    assert items["Bulk In Stock"]["is_available"] is True
+
+
+def test_like_search_fallback_matches_wildcards_literally(client, admin_headers):
+    from sqlalchemy import select
+
+    from app.database import SessionLocal
+    from app.models import MenuItem
+    from app.search import menu_search_clause
+
+    for name in ("Blend 100% Arabica", "Blend 1000 Robusta", "Cold_Brew", "ColdXBrew"):
+        response = client.post("/menu/", json={"name": name, "price": 3.0}, headers=admin_headers)
+        assert response.status_code == 201, response.text
+
+    def search(q):
+        with SessionLocal() as db:
+            return sorted(db.scalars(select(MenuItem.name).where(menu_search_clause(MenuItem, q, use_fts=False))))
+
+    assert search("100%") == ["Blend 100% Arabica"]
+    assert search("d_b") == ["Cold_Brew"]
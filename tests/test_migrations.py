@@ -0,0 +1,39 @@
+# tests/test_migrations.py
+
+from sqlalchemy import inspect
+
+from app import migrations
+from app.database import engine
+from app.stores import store_engine
+
+
+def _user_foreign_keys(bind, table="orders"):
+    return [fk for fk in inspect(bind).get_foreign_keys(table) if fk["referred_table"] == "users"]
+
+
+def test_store_orders_have_no_user_foreign_key():
+    store = store_engine("downtown")
+    try:
+        migrations.upgrade(store, target=8, store="downtown")
+        with store.begin() as conn:
+            conn.exec_driver_sql("INSERT INTO orders (id, user_id, status) VALUES (1, 42, 'paid')")
+            conn.exec_driver_sql(
+                "INSERT INTO order_items (order_id, menu_item_id, quantity) VALUES (1, 1, 2)"
+            )
+        assert _user_foreign_keys(store)
+
+        migrations.upgrade(store, store="downtown")
+        assert not _user_foreign_keys(store)
+        index_names = {index["name"] for index in inspect(store).get_indexes("orders")}
+        assert {"ix_orders_user_id_created_at", "ix_orders_ticket"} <= index_names
+        with store.connect() as conn:
+            assert conn.exec_driver_sql("SELECT user_id, version FROM orders").all() == [(42, 1)]
+            assert conn.exec_driver_sql("SELECT order_id FROM order_items").all() == [(1,)]
+
+        migrations.downgrade(store, 8, store="downtown")
+        assert _user_foreign_keys(store)
+    finally:
+        store.dispose()
+
+    # The main database holds the users, so it keeps the key
+    assert _user_foreign_keys(engine)
@@ -0,0 +1,45 @@
+# tests/test_orders.py
+
+import time
+from datetime import datetime, timedelta
+
+from app import config
+from app.database import SessionLocal
+from app.models import IdempotencyKey
+
+
+def _wait_for_ticket(client, status_url, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        ticket = client.get(status_url).json()
+        if ticket["status"] != "queued" or time.monotonic() > deadline:
+            return ticket
+        time.sleep(0.02)
+
+
+def test_write_behind_replaces_expired_idempotency_key(client, menu_item, monkeypatch):
+    monkeypatch.setattr(config, "ORDER_WRITE_BEHIND", True)
+
+    key = "expired-key"
+    db = SessionLocal()
+    db.add(IdempotencyKey(
+        key=key,
+        request_hash="from an older request",
+        status_code=201,
+        response_body="{}",
+        created_at=datetime.utcnow() - timedelta(hours=config.IDEMPOTENCY_KEY_TTL_HOURS + 1)
+    ))
+    db.commit()
+    db.close()
+
+    order = {"items": [{"menu_item_id": menu_item["id"], "quantity": 1}]}
+    response = client.post("/orders/", json=order, headers={"Idempotency-Key": key})
+    assert response.status_code == 202, response.text
+
+    ticket = _wait_for_ticket(client, response.json()["status_url"])
+    assert ticket["status"] == "created", ticket
+
+    retry = client.post("/orders/", json=order, headers={"Idempotency-Key": key})
+    assert retry.status_code == 202
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json()["ticket"] == response.json()["ticket"]
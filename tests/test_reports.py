@@ -0,0 +1,13 @@
+# tests/test_reports.py
+
+from seed import seed_bulk
+
+
+def test_bulk_seeded_orders_show_up_in_reports(client, admin_headers):
+    before = client.get("/reports/summary", headers=admin_headers).json()
+
+    seed_bulk(users=2, items=3, orders=20, max_lines=2, days=2)
+
+    after = client.get("/reports/summary", headers=admin_headers).json()
+    assert after["order_count"] == before["order_count"] + 20
+    assert after["revenue"] > before["revenue"]